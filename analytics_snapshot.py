@@ -0,0 +1,288 @@
+"""
+Columnar snapshot of application decisions for admin analytics.
+
+A snapshot is a directory of NumPy .npy files, one per column, holding only
+non-sensitive decision data:
+
+    status               int8     0 = PENDING, 1 = APPROVED, 2 = REJECTED
+    amount               int64    requested amount
+    term_bucket          int8     index into TERM_BUCKET_LABELS, -1 if unknown
+    model_score          float32  approval probability, NaN if undecided
+    ratio_bucket         int8     index into RATIO_BUCKET_LABELS (amount / annual income), -1 if unknown
+    created_at           int64    unix seconds, 0 if unknown
+    decided_at           int64    unix seconds, 0 if undecided
+
+The snapshot job decrypts each row once; the analytics endpoint then maps the
+files with np.load(mmap_mode='r') and aggregates them vectorized, so no
+request ever decrypts anything. The job is meant to run periodically, e.g.
+from cron:
+
+    flask --app api analytics-snapshot
+
+Snapshots are written to a new directory and published by atomically
+replacing the CURRENT pointer file; the previous snapshot is kept so
+readers that already mapped it are unaffected.
+"""
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+import numpy as np
+from sqlalchemy import select
+
+from database import shards, Application
+from encryption_utils import decrypt_data
+
+STATUS_CODES = {'PENDING': 0, 'APPROVED': 1, 'REJECTED': 2}
+STATUS_NAMES = ['PENDING', 'APPROVED', 'REJECTED']
+
+# Upper bound (months, inclusive) of each term bucket; anything longer is the last bucket
+TERM_BUCKET_EDGES = [12, 36, 60]
+TERM_BUCKET_LABELS = ['<=12', '13-36', '37-60', '>60']
+
+# Upper bound (inclusive) of each amount / annual income bucket. Only the bucket is
+# stored: an exact ratio next to the exact amount would give the income back
+RATIO_BUCKET_EDGES = [0.5, 1, 2, 3, 5]
+RATIO_BUCKET_LABELS = ['<=0.5', '0.5-1', '1-2', '2-3', '3-5', '>5']
+
+AMOUNT_BIN_EDGES = [0, 10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000]
+
+COLUMNS = {
+    'status': np.int8,
+    'amount': np.int64,
+    'term_bucket': np.int8,
+    'model_score': np.float32,
+    'ratio_bucket': np.int8,
+    'created_at': np.int64,
+    'decided_at': np.int64,
+}
+
+CURRENT_FILE = 'CURRENT'
+KEEP_SNAPSHOTS = 2
+
+
+def term_bucket(term):
+    return int(np.searchsorted(TERM_BUCKET_EDGES, term, side='left'))
+
+
+def ratio_bucket(amount, income):
+    if income <= 0:
+        return -1
+    return int(np.searchsorted(RATIO_BUCKET_EDGES, amount / income, side='left'))
+
+
+def _unix(dt):
+    if dt is None:
+        return 0
+    return int(dt.replace(tzinfo=timezone.utc).timestamp())
+
+
+class SnapshotWriter:
+    """Fill pre-sized memory-mapped .npy columns chunk by chunk, then publish."""
+
+    def __init__(self, base_dir, n_rows):
+        self.base_dir = base_dir
+        self.n_rows = n_rows
+        self.name = 'snapshot-' + datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+        self.path = os.path.join(base_dir, self.name)
+        os.makedirs(self.path)
+        self.columns = {
+            col: np.lib.format.open_memmap(os.path.join(self.path, col + '.npy'), mode='w+',
+                                           dtype=dtype, shape=(n_rows,))
+            for col, dtype in COLUMNS.items()
+        }
+        self.offset = 0
+
+    def append(self, chunk):
+        """chunk: dict of column name -> array-like, all the same length."""
+        n = len(chunk['status'])
+        end = self.offset + n
+        for col in COLUMNS:
+            self.columns[col][self.offset:end] = chunk[col]
+        self.offset = end
+
+    def commit(self):
+        for col, arr in self.columns.items():
+            arr.flush()
+        self.columns = {}
+        if self.offset != self.n_rows:
+            # Rows were deleted while the job ran: truncate by rewriting the columns
+            for col in COLUMNS:
+                path = os.path.join(self.path, col + '.npy')
+                np.save(path, np.load(path)[:self.offset])
+
+        fd, tmp = tempfile.mkstemp(dir=self.base_dir, prefix='.tmp-')
+        with os.fdopen(fd, 'w') as f:
+            f.write(self.name)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.base_dir, CURRENT_FILE))
+        _prune(self.base_dir, self.name)
+        return self.name
+
+
+def _prune(base_dir, current):
+    snapshots = sorted(d for d in os.listdir(base_dir) if d.startswith('snapshot-'))
+    for old in snapshots:
+        if old == current:
+            continue
+        # Snapshots with other columns (e.g. the exact income ratio of older versions) go right away
+        outdated = set(os.listdir(os.path.join(base_dir, old))) != {col + '.npy' for col in COLUMNS}
+        if outdated or old in snapshots[:-KEEP_SNAPSHOTS]:
+            shutil.rmtree(os.path.join(base_dir, old), ignore_errors=True)
+
+
+def snapshot_from_db(base_dir, chunksize=10_000):
+    """Export the Application table from every shard. Call inside an app context."""
+    os.makedirs(base_dir, exist_ok=True)
+    writer = SnapshotWriter(base_dir, shards.count_rows())
+    try:
+        _export_rows(writer, chunksize)
+    except BaseException:
+        shutil.rmtree(writer.path, ignore_errors=True)
+        raise
+    return writer.commit()
+
+
+def _export_rows(writer, chunksize):
+    query = select(Application).order_by(Application.id).execution_options(yield_per=chunksize)
+    chunk = {col: [] for col in COLUMNS}
+    for app_record in shards.scalars(query):
+        if writer.offset + len(chunk['status']) >= writer.n_rows:
+            break
+        try:
+            term = int(decrypt_data(app_record.encrypted_term))
+            bucket = term_bucket(term)
+        except ValueError:
+            bucket = -1
+        try:
+            ratio = ratio_bucket(app_record.amount, int(decrypt_data(app_record.encrypted_income)))
+        except ValueError:
+            ratio = -1
+
+        chunk['status'].append(STATUS_CODES.get(app_record.status, 0))
+        chunk['amount'].append(app_record.amount)
+        chunk['term_bucket'].append(bucket)
+        chunk['model_score'].append(app_record.model_score if app_record.model_score is not None else np.nan)
+        chunk['ratio_bucket'].append(ratio)
+        chunk['created_at'].append(_unix(app_record.created_at))
+        chunk['decided_at'].append(_unix(app_record.decided_at))
+
+        if len(chunk['status']) == chunksize:
+            writer.append(chunk)
+            chunk = {col: [] for col in COLUMNS}
+    if chunk['status']:
+        writer.append(chunk)
+
+
+_loaded = {}
+
+
+def load_snapshot(base_dir):
+    """Memory-map the current snapshot. Returns (name, columns) or (None, None)."""
+    try:
+        with open(os.path.join(base_dir, CURRENT_FILE)) as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None, None
+    if name not in _loaded:
+        path = os.path.join(base_dir, name)
+        try:
+            columns = {col: np.load(os.path.join(path, col + '.npy'), mmap_mode='r') for col in COLUMNS}
+        except FileNotFoundError:
+            return None, None  # written with an older column set: wait for the next snapshot
+        _loaded.clear()
+        _loaded[name] = columns
+    return name, _loaded[name]
+
+
+_summaries = {}
+
+
+def current_summary(base_dir):
+    """summarize() of the current snapshot, computed once per snapshot."""
+    name, columns = load_snapshot(base_dir)
+    if name is None:
+        return None, None
+    if name not in _summaries:
+        _summaries.clear()
+        _summaries[name] = summarize(columns)
+    return name, _summaries[name]
+
+
+def _percentiles(values):
+    if values.dtype.kind == 'f':
+        values = values[~np.isnan(values)]
+    if not len(values):
+        return None
+    p = np.percentile(values, [10, 25, 50, 75, 90])
+    return dict(zip(['p10', 'p25', 'p50', 'p75', 'p90'], [round(float(x), 4) for x in p]))
+
+
+def summarize(columns):
+    """Aggregate a snapshot with whole-column NumPy operations."""
+    status = np.asarray(columns['status'])
+    amount = np.asarray(columns['amount'])
+    bucket = np.asarray(columns['term_bucket'])
+    score = np.asarray(columns['model_score'])
+    ratio = np.asarray(columns['ratio_bucket'])
+
+    counts = np.bincount(status, minlength=3)
+    decided = int(counts[1] + counts[2])
+
+    # Amount histogram split by status in one bincount: bin * 3 + status
+    n_bins = len(AMOUNT_BIN_EDGES)
+    amount_bin = np.searchsorted(AMOUNT_BIN_EDGES, amount, side='right') - 1
+    amount_hist = np.bincount(amount_bin.clip(0) * 3 + status, minlength=n_bins * 3).reshape(n_bins, 3)
+
+    # Term buckets (-1 = unknown, shifted to index 0) by status
+    n_buckets = len(TERM_BUCKET_LABELS) + 1
+    term_hist = np.bincount((bucket.astype(np.int64) + 1) * 3 + status, minlength=n_buckets * 3).reshape(n_buckets, 3)
+    n_ratios = len(RATIO_BUCKET_LABELS) + 1
+    ratio_hist = np.bincount((ratio.astype(np.int64) + 1) * 3 + status, minlength=n_ratios * 3).reshape(n_ratios, 3)
+
+    scored = score[~np.isnan(score)]
+    score_hist, score_edges = np.histogram(scored, bins=10, range=(0.0, 1.0))
+
+    def rate(row):
+        d = int(row[1] + row[2])
+        return round(float(row[1]) / d, 4) if d else None
+
+    amount_labels = [f'{lo:,}+' if i == n_bins - 1 else f'{lo:,}-{AMOUNT_BIN_EDGES[i + 1]:,}'
+                     for i, lo in enumerate(AMOUNT_BIN_EDGES)]
+    return {
+        'total': int(len(status)),
+        'by_status': {name: int(counts[i]) for i, name in enumerate(STATUS_NAMES)},
+        'approval_rate': round(float(counts[1]) / decided, 4) if decided else None,
+        'amount': {
+            'by_status': _percentiles_by_status(amount, status),
+            'histogram': [
+                {'bin': label, **{name: int(amount_hist[i, s]) for s, name in enumerate(STATUS_NAMES)},
+                 'approval_rate': rate(amount_hist[i])}
+                for i, label in enumerate(amount_labels)
+            ],
+        },
+        'amount_income_ratio': [
+            {'bucket': label, **{name: int(ratio_hist[i, s]) for s, name in enumerate(STATUS_NAMES)},
+             'approval_rate': rate(ratio_hist[i])}
+            for i, label in enumerate(['unknown'] + RATIO_BUCKET_LABELS)
+        ],
+        'term': [
+            {'bucket': label, **{name: int(term_hist[i, s]) for s, name in enumerate(STATUS_NAMES)},
+             'approval_rate': rate(term_hist[i])}
+            for i, label in enumerate(['unknown'] + TERM_BUCKET_LABELS)
+        ],
+        'model_score_histogram': [
+            {'from': round(float(score_edges[i]), 2), 'to': round(float(score_edges[i + 1]), 2), 'count': int(c)}
+            for i, c in enumerate(score_hist)
+        ],
+    }
+
+
+def _percentiles_by_status(values, status):
+    return {
+        'all': _percentiles(values),
+        'APPROVED': _percentiles(values[status == 1]),
+        'REJECTED': _percentiles(values[status == 2]),
+    }
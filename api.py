@@ -8,48 +8,75 @@ load_dotenv()
 import os
 import uuid
 import hashlib
-import joblib
-import pandas as pd
 import io
 import base64
 import json
 from datetime import datetime
 
-from flask import Flask, request, jsonify, session, send_from_directory
+import click
+from flask import Flask, request, jsonify, session
 from flask_cors import CORS
-from flask_bcrypt import Bcrypt
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from sqlalchemy import select
 
 import pyotp
 import qrcode
 
 from crypto_utils import generate_keys, sign_data, verify_signature
 from zkp_utils import pedersen_commit, point_to_bytes, prove_pedersen_opening, verify_pedersen_opening
-from encryption_utils import encrypt_data, decrypt_data
-from database import db, Application, Admin, User
+from encryption_utils import encrypt_data, decrypt_data, keyed_hash
+from database import db, shards, Application, Admin, User, upgrade_schema
+from model_utils import build_feature_frame, predict_with_explanations
+from model_registry import ModelRegistry
+from state_backend import shared_backend, limiter_storage_uri
+from password_utils import hash_password, verify_password
+from mfa_service import MFAService
+from analytics_snapshot import snapshot_from_db, current_summary
+from event_log import EventLog
+from response_utils import StaticAssetIndex, compress_response, etag_for, not_modified, with_etag
 from blind_signature_utils import generate_blind_keys, blind_message, sign_blinded_message, unblind_signature
 
-app = Flask(__name__, static_folder='dist', static_url_path='')
+# The React bundle is served from memory by StaticAssetIndex, not Flask's static route
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dist')
+app = Flask(__name__, static_folder=None)
 CORS(app, supports_credentials=True)
 
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', os.urandom(24))
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///privyloans.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['RATELIMIT_ENABLED'] = os.getenv('RATELIMIT_ENABLED', 'true').lower() != 'false'
+shards.config_from_env(app.config)
 
+shards.init_app(app)
 db.init_app(app)
-bcrypt = Bcrypt(app)
 login_manager = LoginManager(app)
-limiter = Limiter(get_remote_address, app=app, default_limits=["200 per day", "50 per hour"])
-
-# Load ML Model
-try:
-    loan_approval_model = joblib.load('loan_model.joblib')
-    scaler = joblib.load('scaler.joblib')
-except Exception:
-    loan_approval_model = None
-    scaler = None
+# Shared across workers: rate-limit counters, pending MFA secrets, caches
+STATE_BACKEND_URL = os.getenv('STATE_BACKEND_URL', 'sqlite:///' + os.path.join(app.instance_path, 'state.db'))
+state = shared_backend(STATE_BACKEND_URL)
+
+DEFAULT_LIMITS = ["200 per day", "50 per hour"]
+limiter = Limiter(get_remote_address, app=app, default_limits=DEFAULT_LIMITS,
+                  storage_uri=limiter_storage_uri(STATE_BACKEND_URL))
+
+MFA_SETUP_TTL = 600
+mfa = MFAService(state)
+APPLY_RESULT_TTL = 600
+APPLY_INFLIGHT_TTL = 30
+
+static_assets = StaticAssetIndex(STATIC_DIR)
+ANALYTICS_DIR = os.getenv('ANALYTICS_DIR', os.path.join(app.instance_path, 'analytics'))
+# Audit trail of status changes, withdrawals and certificates, written behind the request
+events = EventLog(os.getenv('EVENT_LOG_DIR', os.path.join(app.instance_path, 'events')))
+app.after_request(compress_response)
+
+# Load ML Model (reloaded in the background when the artifacts change)
+model_registry = ModelRegistry(
+    'loan_model.joblib', 'scaler.joblib', 'model_manifest.json',
+    poll_interval=float(os.getenv('MODEL_POLL_SECONDS', 30))
+)
+model_registry.load()
 
 # Crypto Keys
 private_key, public_key = generate_keys()
@@ -64,10 +91,12 @@ def init_db():
     """Initialize database tables and create default admin user"""
     with app.app_context():
         db.create_all()
-        
+        upgrade_schema()
+        shards.create_all()
+
         # Create default admin if not exists
         if not Admin.query.filter_by(username='admin').first():
-            admin_password = bcrypt.generate_password_hash('admin123').decode('utf-8')
+            admin_password = hash_password('admin123')
             admin = Admin(
                 username='admin',
                 password_hash=admin_password,
@@ -101,17 +130,138 @@ def check_eligibility(age, income):
     return errors
 
 
-def explain_rejection(age, income, amount, term):
-    reasons = []
-    if age < 21 or age > 60:
-        reasons.append("Age is outside the recommended lending range (21–60).")
-    if amount > income * 0.5:
-        reasons.append("Requested loan amount is high relative to annual income.")
-    if term > 60:
-        reasons.append("Loan term exceeds recommended maximum of 60 months.")
-    if not reasons:
-        reasons.append("The ML model predicted high credit risk based on the input factors.")
-    return reasons
+def verify_application_record(app_record):
+    """Check the RSA signature and the Pedersen opening proof stored on an application."""
+    commitment_bytes = bytes.fromhex(app_record.commitment)
+    signature_bytes = bytes.fromhex(app_record.signature)
+    proof = {'t': app_record.proof_t, 's1': app_record.proof_s1, 's2': app_record.proof_s2}
+
+    return verify_signature(public_key, commitment_bytes, signature_bytes) and \
+           verify_pedersen_opening(app_record.commitment, proof)
+
+
+def unblind_token(app_record, blind_N):
+    signed_blinded_int = int(app_record.blind_signature)
+    r = int(app_record.blinding_factor_r)
+    return unblind_signature(signed_blinded_int, r, int(blind_N))
+
+
+def issue_certificates():
+    """Precompute unblinded certificate tokens for approved applications that lack one."""
+    pending = list(shards.scalars(select(Application).where(
+        Application.status == 'APPROVED', Application.certificate_token.is_(None))))
+    # Users live on the main database, so no join across shards
+    user_ids = {app_record.user_id for app_record in pending}
+    blind_Ns = dict(db.session.execute(select(User.id, User.blind_N).where(User.id.in_(user_ids))).all())
+
+    issued = []
+    failed = 0
+    for app_record in pending:
+        try:
+            app_record.certificate_token = unblind_token(app_record, blind_Ns.get(app_record.user_id))
+            app_record.certificate_issued_at = datetime.utcnow()
+            issued.append(app_record)
+        except Exception:
+            failed += 1
+    shards.commit()
+    for app_record in issued:
+        events.emit('certificate.issued', app_id=app_record.id, user_id=app_record.user_id, source='bulk')
+    return len(issued), failed
+
+
+def pin_certificate(app_record, blind_N):
+    """
+    Store the unblinded token and issue time on first fetch, so the certificate
+    body (and its ETag) never changes afterwards, and record the issuance.
+    Shared by the Flask and ASGI routes; call inside an app context.
+    """
+    if app_record.certificate_token:
+        return app_record
+    app_record.certificate_token = unblind_token(app_record, blind_N)
+    app_record.certificate_issued_at = datetime.utcnow()
+    shards.commit()
+    events.emit('certificate.issued', app_id=app_record.id, user_id=app_record.user_id, source='on_demand')
+    return app_record
+
+
+def certificate_etag(app_record):
+    """ETag of a pinned certificate: everything build_certificate() renders from."""
+    return etag_for(
+        app_record.id, app_record.commitment, app_record.certificate_token,
+        app_record.certificate_issued_at, BLIND_PUB_N, BLIND_PUB_E
+    )
+
+
+def build_certificate(app_record, blind_N):
+    """Unblind the admin's token for an approved application and render its QR certificate."""
+    token_hex = app_record.certificate_token or unblind_token(app_record, blind_N)
+
+    qr_payload = {
+        "app_id": app_record.id,
+        "commitment": app_record.commitment,
+        "token": token_hex,
+        "N": str(BLIND_PUB_N),
+        "e": str(BLIND_PUB_E),
+    }
+    qr_json = json.dumps(qr_payload, separators=(",", ":"))
+
+    img = qrcode.make(qr_json)
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    qr_code_b64 = base64.b64encode(buffer.getvalue()).decode("ascii")
+
+    return {
+        'app_id': app_record.id,
+        'commitment': app_record.commitment,
+        'token': token_hex,
+        'N': str(BLIND_PUB_N),
+        'e': str(BLIND_PUB_E),
+        'issued_at': (app_record.certificate_issued_at or datetime.utcnow()).strftime("%Y-%m-%d %H:%M UTC"),
+        'qr_code': qr_code_b64
+    }
+
+
+def normalize_submission(user_id, name, email, pan, purpose, phone, age, income, term, amount):
+    """Canonical form of an application, so trivially different retries hash the same."""
+    def clean(value):
+        return ' '.join(str(value or '').split())
+
+    return json.dumps([
+        user_id, clean(name).casefold(), clean(email).lower(), clean(pan).upper(),
+        clean(purpose).casefold(), clean(phone), age, income, term, amount
+    ], separators=(',', ':'))
+
+
+def _cached_result(app_id):
+    return jsonify({'message': 'Application submitted', 'app_id': app_id, 'duplicate': True}), 200
+
+
+def find_duplicate_submission(user_id, idempotency_key, submission_hash):
+    """Return the response for an already-submitted application, or None."""
+    if idempotency_key:
+        cache_key = f'apply:idem:{user_id}:{idempotency_key}'
+        cached = state.get(cache_key)
+        if cached is None:
+            existing = shards.first(select(Application).filter_by(user_id=user_id, idempotency_key=idempotency_key))
+            if existing is not None:
+                cached = json.dumps([existing.id, existing.submission_hash])
+                state.set(cache_key, cached, ttl=APPLY_RESULT_TTL)
+        if cached is not None:
+            app_id, original_hash = json.loads(cached)
+            if original_hash != submission_hash:
+                return jsonify({'message': 'Idempotency-Key was already used for a different application'}), 422
+            return _cached_result(app_id)
+
+    cached = state.get(f'apply:sub:{submission_hash}')
+    if cached is not None:
+        return _cached_result(cached)
+
+    # Identical content only counts as a retry while the first copy is still pending
+    existing = shards.first(select(Application).filter_by(submission_hash=submission_hash, status='PENDING'))
+    if existing is not None:
+        state.set(f'apply:sub:{submission_hash}', existing.id, ttl=APPLY_RESULT_TTL)
+        return _cached_result(existing.id)
+    return None
 
 
 # ============ AUTH ROUTES ============
@@ -125,7 +275,7 @@ def api_register():
     if User.query.filter_by(username=username).first():
         return jsonify({'message': 'Username already exists'}), 400
 
-    hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
+    hashed_password = hash_password(password)
     new_user = User(username=username, password_hash=hashed_password, blind_N=str(BLIND_PUB_N))
 
     db.session.add(new_user)
@@ -147,8 +297,12 @@ def api_login():
     password = data.get('password')
 
     user = User.query.filter_by(username=username).first()
+    ok, new_hash = verify_password(password, user.password_hash) if user else (False, None)
 
-    if user and bcrypt.check_password_hash(user.password_hash, password):
+    if ok:
+        if new_hash:
+            user.password_hash = new_hash
+            db.session.commit()
         login_user(user)
         session['user_type'] = 'User'
 
@@ -172,8 +326,12 @@ def api_admin_login():
     password = data.get('password')
 
     admin = Admin.query.filter_by(username=username).first()
+    ok, new_hash = verify_password(password, admin.password_hash) if admin else (False, None)
 
-    if admin and bcrypt.check_password_hash(admin.password_hash, password):
+    if ok:
+        if new_hash:
+            admin.password_hash = new_hash
+            db.session.commit()
         login_user(admin)
         session['user_type'] = 'Admin'
 
@@ -219,19 +377,23 @@ def api_setup_mfa():
     if request.method == 'POST':
         data = request.get_json()
         code = data.get('code')
-        totp = pyotp.TOTP(session['mfa_secret'])
+        secret = state.get(f'mfa:setup:{current_user.id}')
+        if secret is None:
+            return jsonify({'message': 'MFA setup expired, please start again'}), 400
 
-        if totp.verify(code):
-            current_user.mfa_secret = session['mfa_secret']
+        # Same key as login, so the code that enables MFA cannot be replayed to pass the first MFA login
+        if mfa.verify(current_user.id, secret, code):
+            current_user.mfa_secret = secret
             current_user.mfa_enabled = True
             db.session.commit()
-            session.pop('mfa_secret', None)
+            state.delete(f'mfa:setup:{current_user.id}')
             return jsonify({'message': 'MFA enabled successfully'}), 200
 
         return jsonify({'message': 'Invalid code'}), 400
 
     secret = pyotp.random_base32()
-    session['mfa_secret'] = secret
+    # Kept server-side: the session cookie is signed but readable by the client
+    state.set(f'mfa:setup:{current_user.id}', secret, ttl=MFA_SETUP_TTL)
     provisioning_uri = pyotp.totp.TOTP(secret).provisioning_uri(
         name=current_user.username, issuer_name="PrivyLoans")
 
@@ -248,10 +410,11 @@ def api_setup_mfa():
 def api_verify_mfa():
     data = request.get_json()
     code = data.get('code')
-    user = User.query.get(session.get('user_id_mfa'))
+    # login_user() already loaded this user; no second query for the secret
+    if not isinstance(current_user, User) or session.get('user_id_mfa') != current_user.id:
+        return jsonify({'message': 'No MFA verification pending'}), 400
 
-    totp = pyotp.TOTP(user.mfa_secret)
-    if totp.verify(code):
+    if mfa.verify(current_user.id, current_user.mfa_secret, code):
         session.pop('mfa_pending', None)
         session.pop('user_id_mfa', None)
         return jsonify({'message': 'MFA verified'}), 200
@@ -272,7 +435,7 @@ def api_get_applications():
         'amount': app.amount,
         'purpose': decrypt_data(app.encrypted_purpose),
         'status': app.status
-    } for app in current_user.applications]
+    } for app in shards.scalars(select(Application).where(Application.user_id == current_user.id))]
 
     return jsonify({'applications': decrypted_apps}), 200
 
@@ -299,6 +462,33 @@ def api_apply():
     if errors:
         return jsonify({'message': errors[0]}), 400
 
+    # Retries are answered before any proof or signing work is done
+    idempotency_key = request.headers.get('Idempotency-Key', '').strip()[:128] or None
+    submission_hash = keyed_hash(normalize_submission(
+        current_user.id, name, email, pan, purpose, phone, age, income, term, amount))
+
+    duplicate = find_duplicate_submission(current_user.id, idempotency_key, submission_hash)
+    if duplicate is not None:
+        return duplicate
+
+    # Guard against two retries racing past the lookup above
+    if not state.add(f'apply:inflight:{submission_hash}', '1', ttl=APPLY_INFLIGHT_TTL):
+        return jsonify({'message': 'An identical application is already being submitted'}), 409
+
+    try:
+        # Check again under the guard: a racing request may have committed and released it since
+        duplicate = find_duplicate_submission(current_user.id, idempotency_key, submission_hash)
+        if duplicate is not None:
+            return duplicate
+        return create_application(
+            idempotency_key, submission_hash,
+            name, email, pan, purpose, phone, age, income, term, amount)
+    finally:
+        state.delete(f'apply:inflight:{submission_hash}')
+
+
+def create_application(idempotency_key, submission_hash,
+                       name, email, pan, purpose, phone, age, income, term, amount):
     app_id = str(uuid.uuid4())
 
     value_int = int.from_bytes(hashlib.sha256(f"{name}-{amount}".encode()).digest(), "big")
@@ -328,11 +518,19 @@ def api_apply():
         proof_s2=proof['s2'],
         status='PENDING',
         blind_signature=str(blinded_int),
-        blinding_factor_r=str(blind_r)
+        blinding_factor_r=str(blind_r),
+        idempotency_key=idempotency_key,
+        submission_hash=submission_hash
     )
 
-    db.session.add(new_app)
-    db.session.commit()
+    shards.add(new_app)
+    shards.commit()
+    events.emit('application.submitted', app_id=app_id, user_id=current_user.id, status='PENDING')
+
+    if idempotency_key:
+        state.set(f'apply:idem:{current_user.id}:{idempotency_key}',
+                  json.dumps([app_id, submission_hash]), ttl=APPLY_RESULT_TTL)
+    state.set(f'apply:sub:{submission_hash}', app_id, ttl=APPLY_RESULT_TTL)
 
     return jsonify({'message': 'Application submitted', 'app_id': app_id}), 201
 
@@ -340,16 +538,24 @@ def api_apply():
 @app.route('/api/applications/<app_id>', methods=['GET'])
 @login_required
 def api_get_application(app_id):
-    app_record = Application.query.filter_by(id=app_id, user_id=current_user.id).first()
+    app_record = shards.get(app_id, user_id=current_user.id)
     if not app_record:
         return jsonify({'message': 'Application not found'}), 404
 
-    commitment_bytes = bytes.fromhex(app_record.commitment)
-    signature_bytes = bytes.fromhex(app_record.signature)
-    proof = {'t': app_record.proof_t, 's1': app_record.proof_s1, 's2': app_record.proof_s2}
+    # Everything the response is derived from; a match skips decryption and verification
+    etag = etag_for(
+        app_record.id, app_record.name, app_record.amount, app_record.status,
+        app_record.commitment, app_record.signature,
+        app_record.proof_t, app_record.proof_s1, app_record.proof_s2,
+        app_record.encrypted_email, app_record.encrypted_phone, app_record.encrypted_pan,
+        app_record.encrypted_age, app_record.encrypted_purpose,
+        app_record.encrypted_term, app_record.encrypted_income
+    )
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
 
-    is_zkp_valid = verify_signature(public_key, commitment_bytes, signature_bytes) and \
-                   verify_pedersen_opening(app_record.commitment, proof)
+    is_zkp_valid = verify_application_record(app_record)
 
     data = {
         'id': app_record.id,
@@ -366,28 +572,36 @@ def api_get_application(app_id):
         'is_zkp_valid': is_zkp_valid
     }
 
-    return jsonify({'application': data}), 200
+    return with_etag(jsonify({'application': data}), etag), 200
 
 
 @app.route('/api/applications/<app_id>/withdraw', methods=['POST'])
 @login_required
 def api_withdraw_application(app_id):
-    app_record = Application.query.filter_by(id=app_id, user_id=current_user.id).first()
+    app_record = shards.get(app_id, user_id=current_user.id)
     if not app_record:
         return jsonify({'message': 'Application not found'}), 404
 
     if app_record.status in ['APPROVED', 'REJECTED']:
         return jsonify({'message': 'Cannot withdraw finalized application'}), 400
 
-    db.session.delete(app_record)
-    db.session.commit()
+    from_status = app_record.status
+    shards.delete(app_record)
+    shards.commit()
+    events.emit('application.withdrawn', app_id=app_id, user_id=current_user.id, from_status=from_status)
+
+    # A withdrawn application must not be served as the result of a retry
+    if app_record.submission_hash:
+        state.delete(f'apply:sub:{app_record.submission_hash}')
+    if app_record.idempotency_key:
+        state.delete(f'apply:idem:{current_user.id}:{app_record.idempotency_key}')
     return jsonify({'message': 'Application withdrawn'}), 200
 
 
 @app.route('/api/applications/<app_id>/certificate', methods=['GET'])
 @login_required
 def api_get_certificate(app_id):
-    app_record = Application.query.filter_by(id=app_id, user_id=current_user.id).first()
+    app_record = shards.get(app_id, user_id=current_user.id)
     if not app_record:
         return jsonify({'message': 'Application not found'}), 404
 
@@ -395,35 +609,13 @@ def api_get_certificate(app_id):
         return jsonify({'message': 'Certificate available only for approved applications'}), 400
 
     try:
-        signed_blinded_int = int(app_record.blind_signature)
-        r = int(app_record.blinding_factor_r)
-        N_user = int(current_user.blind_N)
-
-        token_hex = unblind_signature(signed_blinded_int, r, N_user)
-
-        qr_payload = {
-            "app_id": app_record.id,
-            "commitment": app_record.commitment,
-            "token": token_hex,
-            "N": str(BLIND_PUB_N),
-            "e": str(BLIND_PUB_E),
-        }
-        qr_json = json.dumps(qr_payload, separators=(",", ":"))
+        pin_certificate(app_record, current_user.blind_N)
+        etag = certificate_etag(app_record)
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
 
-        img = qrcode.make(qr_json)
-        buffer = io.BytesIO()
-        img.save(buffer, format="PNG")
-        qr_code_b64 = base64.b64encode(buffer.getvalue()).decode("ascii")
-
-        return jsonify({
-            'app_id': app_record.id,
-            'commitment': app_record.commitment,
-            'token': token_hex,
-            'N': str(BLIND_PUB_N),
-            'e': str(BLIND_PUB_E),
-            'issued_at': datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC"),
-            'qr_code': qr_code_b64
-        }), 200
+        return with_etag(jsonify(build_certificate(app_record, current_user.blind_N)), etag), 200
 
     except Exception as e:
         return jsonify({'message': f'Could not generate certificate: {str(e)}'}), 500
@@ -437,61 +629,75 @@ def api_admin_applications():
     if not isinstance(current_user, Admin):
         return jsonify({'message': 'Admin access required'}), 403
 
-    apps = Application.query.all()
-    apps_data = []
+    apps = list(shards.scalars(select(Application)))
+    decisions = {}
+    loaded = model_registry.current()
 
-    for app_record in apps:
-        commitment_bytes = bytes.fromhex(app_record.commitment)
-        signature_bytes = bytes.fromhex(app_record.signature)
-        proof = {'t': app_record.proof_t, 's1': app_record.proof_s1, 's2': app_record.proof_s2}
-
-        is_valid = verify_signature(public_key, commitment_bytes, signature_bytes) and \
-                   verify_pedersen_opening(app_record.commitment, proof)
-
-        prediction = app_record.status.replace("_", " ")
-        explanations = []
+    if loaded.model is not None:
+        pending = []
+        inputs = []
+        for app_record in apps:
+            if app_record.status != 'PENDING':
+                continue
+            try:
+                inputs.append((
+                    int(decrypt_data(app_record.encrypted_age)),
+                    int(decrypt_data(app_record.encrypted_income)),
+                    app_record.amount,
+                    int(decrypt_data(app_record.encrypted_term))
+                ))
+                pending.append(app_record)
+            except Exception:
+                decisions[app_record.id] = "Error"
 
-        if app_record.status == 'PENDING' and loan_approval_model is not None:
+        if pending:
             try:
-                age = int(decrypt_data(app_record.encrypted_age))
-                income = int(decrypt_data(app_record.encrypted_income))
-                term = int(decrypt_data(app_record.encrypted_term))
-                amount = app_record.amount
-
-                df = pd.DataFrame({
-                    'Age': [age],
-                    'Income': [income],
-                    'Credit_Score': [750],
-                    'Loan_Amount': [amount],
-                    'Loan_Term': [term],
-                    'Employment_Status_Unemployed': [0]
-                })
-
-                features = df[['Age', 'Income', 'Credit_Score', 'Loan_Amount', 'Loan_Term', 'Employment_Status_Unemployed']]
-                features_scaled = scaler.transform(features) if scaler else features
-                result = loan_approval_model.predict(features_scaled)[0]
-
-                if result == 1:
-                    app_record.status = 'APPROVED'
-                    prediction = "Approved"
-                    blinded_int = int(app_record.blind_signature)
-                    signed_blinded = sign_blinded_message(blinded_int, int(current_user.blind_priv_N), int(current_user.blind_priv_d))
-                    app_record.blind_signature = str(signed_blinded)
-                else:
-                    app_record.status = 'REJECTED'
-                    prediction = "Rejected"
-                    explanations = explain_rejection(age, income, amount, term)
-
-                db.session.commit()
+                results, scores, reasons = predict_with_explanations(
+                    loaded.model, loaded.scaler, build_feature_frame(inputs))
+
+                decided_at = datetime.utcnow()
+                for app_record, result, score, row_reasons in zip(pending, results, scores, reasons):
+                    app_record.model_score = float(score)
+                    app_record.decided_at = decided_at
+                    if result == 1:
+                        app_record.status = 'APPROVED'
+                        decisions[app_record.id] = "Approved"
+                        blinded_int = int(app_record.blind_signature)
+                        signed_blinded = sign_blinded_message(blinded_int, int(current_user.blind_priv_N), int(current_user.blind_priv_d))
+                        app_record.blind_signature = str(signed_blinded)
+                    else:
+                        app_record.status = 'REJECTED'
+                        decisions[app_record.id] = "Rejected"
+                        app_record.rejection_reasons = json.dumps(row_reasons)
+
+                shards.commit()
+
+                for app_record in pending:
+                    events.emit('application.decided', app_id=app_record.id, user_id=app_record.user_id,
+                                from_status='PENDING', status=app_record.status,
+                                score=app_record.model_score, admin_id=current_user.id)
+                    # Decided applications no longer absorb identical resubmissions
+                    if app_record.submission_hash:
+                        state.delete(f'apply:sub:{app_record.submission_hash}')
             except Exception:
-                prediction = "Error"
+                shards.rollback()
+                for app_record in pending:
+                    decisions[app_record.id] = "Error"
+
+    apps_data = []
+    for app_record in apps:
+        is_valid = verify_application_record(app_record)
+
+        explanations = []
+        if app_record.status == 'REJECTED' and app_record.rejection_reasons:
+            explanations = json.loads(app_record.rejection_reasons)
 
         apps_data.append({
             "id": app_record.id,
             "name": app_record.name,
             "amount": app_record.amount,
             "valid": is_valid,
-            "prediction": prediction,
+            "prediction": decisions.get(app_record.id, app_record.status.replace("_", " ")),
             "status": app_record.status,
             "explanations": explanations
         })
@@ -499,6 +705,76 @@ def api_admin_applications():
     return jsonify({'applications': apps_data}), 200
 
 
+@app.route('/api/admin/certificates/issue', methods=['POST'])
+@login_required
+def api_admin_issue_certificates():
+    if not isinstance(current_user, Admin):
+        return jsonify({'message': 'Admin access required'}), 403
+
+    issued, failed = issue_certificates()
+    return jsonify({'issued': issued, 'failed': failed}), 200
+
+
+@app.cli.command('issue-certificates')
+def issue_certificates_command():
+    """Precompute certificate tokens for all newly approved applications."""
+    issued, failed = issue_certificates()
+    print(f"Issued {issued} certificates ({failed} failed)")
+
+
+@app.route('/api/admin/analytics', methods=['GET'])
+@login_required
+def api_admin_analytics():
+    if not isinstance(current_user, Admin):
+        return jsonify({'message': 'Admin access required'}), 403
+
+    name, summary = current_summary(ANALYTICS_DIR)
+    if name is None:
+        return jsonify({'message': 'No analytics snapshot yet. Run `flask --app api analytics-snapshot`.'}), 404
+
+    return jsonify({'snapshot': name, 'analytics': summary}), 200
+
+
+@app.cli.command('analytics-snapshot')
+def analytics_snapshot_command():
+    """Write a new columnar snapshot of application decisions."""
+    name = snapshot_from_db(ANALYTICS_DIR)
+    print(f"Wrote analytics snapshot {name}")
+
+
+@app.cli.command('rebalance-shards')
+@click.option('--drain', multiple=True, help='URL of a retired shard to empty (repeatable)')
+@click.option('--batch-size', default=1000, show_default=True)
+def rebalance_shards_command(drain, batch_size):
+    """Move applications to the shard they hash to under APPLICATION_SHARD_URLS."""
+    if not shards.rebalancing:
+        raise click.UsageError('Set APPLICATION_SHARD_REBALANCING=true on every worker (and here) first, '
+                               'so lookups find rows that have not moved yet')
+    shards.create_all()
+    moved, skipped = shards.rebalance(drain_urls=drain, batch_size=batch_size)
+    for (source, target), rows in sorted(moved.items(), key=str):
+        print(f"  {source} -> shard {target}: {rows} rows")
+    print(f"Moved {sum(moved.values())} applications across {shards.count} shards")
+    if skipped:
+        print(f"{len(skipped)} applications changed during the move and were left in place; run again to move them")
+
+
+@app.route('/api/admin/events', methods=['GET'])
+@login_required
+def api_admin_events():
+    if not isinstance(current_user, Admin):
+        return jsonify({'message': 'Admin access required'}), 403
+
+    # Malformed numbers fall back to the defaults (type= conversions never raise)
+    limit = max(1, min(request.args.get('limit', 100, type=int), 1000))
+    found = events.query(
+        limit=limit, since=request.args.get('since', type=float), until=request.args.get('until', type=float),
+        types=request.args.getlist('type') or None,
+        app_id=request.args.get('app_id')
+    )
+    return jsonify({'events': found, 'dropped': events.dropped}), 200
+
+
 # ============ PUBLIC STATUS CHECK ============
 
 @app.route('/api/status/check', methods=['POST'])
@@ -506,16 +782,11 @@ def api_check_status():
     data = request.get_json()
     app_id = data.get('app_id')
 
-    app_record = Application.query.get(app_id)
+    app_record = shards.get(app_id)
     if not app_record:
         return jsonify({'message': 'Application not found'}), 404
 
-    commitment_bytes = bytes.fromhex(app_record.commitment)
-    signature_bytes = bytes.fromhex(app_record.signature)
-    proof = {'t': app_record.proof_t, 's1': app_record.proof_s1, 's2': app_record.proof_s2}
-
-    is_valid = verify_signature(public_key, commitment_bytes, signature_bytes) and \
-               verify_pedersen_opening(app_record.commitment, proof)
+    is_valid = verify_application_record(app_record)
 
     return jsonify({
         'application': {
@@ -531,10 +802,7 @@ def api_check_status():
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
-    if path != "" and os.path.exists(os.path.join(app.static_folder, path)):
-        return send_from_directory(app.static_folder, path)
-    else:
-        return send_from_directory(app.static_folder, 'index.html')
+    return static_assets.serve(path)
 
 
 if __name__ == "__main__":
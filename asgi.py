@@ -0,0 +1,206 @@
+"""
+ASGI entry point for the PrivyLoans API.
+
+The hot read-only routes (public status checks and certificate fetches) are
+served natively async: database access goes through an async SQLAlchemy
+engine and the CPU-bound crypto (signature / ZKP verification, token
+unblinding, QR rendering) runs in a thread pool so the event loop keeps
+accepting requests. Every other route is handed to the existing Flask app
+through a WSGI adapter, so behaviour is unchanged.
+
+Run with:
+    uvicorn asgi:app --workers 2
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from a2wsgi import WSGIMiddleware
+from itsdangerous import BadSignature
+from limits import parse_many
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Mount, Route
+
+from api import (app as flask_app, limiter, DEFAULT_LIMITS, verify_application_record, build_certificate,
+                 pin_certificate, certificate_etag)
+from response_utils import PRIVATE_CACHE_CONTROL, etag_matches
+from database import Application, User, shards
+
+# Sync driver -> async driver for the same database
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgres': 'postgresql+asyncpg',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+
+def async_database_url(url):
+    scheme, sep, rest = url.partition('://')
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+
+def _sqlite_path_for_flask(url):
+    # Flask-SQLAlchemy resolves relative sqlite paths against the instance folder
+    prefix = 'sqlite:///'
+    if url.startswith(prefix) and url != prefix + ':memory:' and not os.path.isabs(url[len(prefix):]):
+        return prefix + os.path.join(flask_app.instance_path, url[len(prefix):])
+    return url
+
+
+# One async engine per application shard; shard 0 is the main database (users too)
+SHARD_URLS = [flask_app.config['SQLALCHEMY_DATABASE_URI']] + flask_app.config['APPLICATION_SHARDS']
+engines = [create_async_engine(async_database_url(_sqlite_path_for_flask(url))) for url in SHARD_URLS]
+AsyncShardSessions = [async_sessionmaker(engine, expire_on_commit=False) for engine in engines]
+AsyncSession = AsyncShardSessions[0]
+
+CRYPTO_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv('CRYPTO_THREADS', os.cpu_count() or 4)),
+    thread_name_prefix='crypto'
+)
+
+
+# Rate-limit storage calls block on I/O, not CPU, so they get their own pool
+LIMITER_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv('LIMITER_THREADS', 8)),
+    thread_name_prefix='limiter'
+)
+
+
+async def run_crypto(fn, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(CRYPTO_EXECUTOR, fn, *args)
+
+
+def flask_session(request):
+    """Decode the signed Flask session cookie so both stacks share logins."""
+    cookie = request.cookies.get(flask_app.config['SESSION_COOKIE_NAME'])
+    if not cookie:
+        return {}
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    max_age = int(flask_app.permanent_session_lifetime.total_seconds())
+    try:
+        return serializer.loads(cookie, max_age=max_age)
+    except BadSignature:
+        return {}
+
+
+RATE_LIMITS = parse_many(';'.join(DEFAULT_LIMITS))
+
+
+def _hit_limits(scope, client):
+    return not all(limiter.limiter.hit(item, 'asgi', scope, client) for item in RATE_LIMITS)
+
+
+async def rate_limited(request, scope):
+    """Apply the Flask app's default limits, using the same limiter storage."""
+    if not limiter.enabled:
+        return False
+    client = request.client.host if request.client else '127.0.0.1'
+    # The storage is synchronous (SQLite transactions or Redis round trips): keep it off the event loop
+    return await asyncio.get_running_loop().run_in_executor(LIMITER_EXECUTOR, _hit_limits, scope, client)
+
+
+def too_many_requests():
+    return JSONResponse({'message': 'Too many requests'}, status_code=429)
+
+
+async def get_application(app_id, user_id=None):
+    """Async counterpart of shards.get(): the home shard, plus the others only while rebalancing."""
+    if not app_id or not isinstance(app_id, str):
+        return None
+    home = shards.shard_for(app_id)
+    order = [home]
+    if shards.rebalancing:
+        order += [shard for shard in range(len(AsyncShardSessions)) if shard != home]
+    for shard in order:
+        async with AsyncShardSessions[shard]() as db_session:
+            app_record = await db_session.get(Application, app_id)
+        if app_record is not None:
+            if user_id is not None and app_record.user_id != user_id:
+                return None
+            return app_record
+    return None
+
+
+def _pin_certificate(app_id, user_id, blind_N):
+    # First fetch only: goes through the same sync helper as the Flask route
+    with flask_app.app_context():
+        app_record = pin_certificate(shards.get(app_id, user_id=user_id), blind_N)
+        return app_record.certificate_token, app_record.certificate_issued_at
+
+
+# ============ ASYNC ROUTES ============
+
+async def api_check_status(request: Request):
+    if await rate_limited(request, 'status_check'):
+        return too_many_requests()
+
+    try:
+        data = await request.json()
+    except ValueError:
+        return JSONResponse({'message': 'Invalid JSON body'}, status_code=400)
+    if not isinstance(data, dict):
+        return JSONResponse({'message': 'Expected a JSON object'}, status_code=400)
+    app_id = data.get('app_id')
+
+    app_record = await get_application(app_id) if app_id else None
+    if not app_record:
+        return JSONResponse({'message': 'Application not found'}, status_code=404)
+
+    is_valid = await run_crypto(verify_application_record, app_record)
+
+    return JSONResponse({
+        'application': {
+            'name': app_record.name,
+            'status': app_record.status,
+            'valid': is_valid
+        }
+    })
+
+
+async def api_get_certificate(request: Request):
+    if await rate_limited(request, 'certificate'):
+        return too_many_requests()
+
+    sess = flask_session(request)
+    user_id = sess.get('_user_id')
+    if not user_id or sess.get('user_type') != 'User':
+        return JSONResponse({'message': 'Unauthorized'}, status_code=401)
+
+    app_id = request.path_params['app_id']
+    app_record = await get_application(app_id, user_id=int(user_id))
+    user = None
+    if app_record:
+        async with AsyncSession() as db_session:
+            user = await db_session.get(User, int(user_id))
+
+    if not app_record or not user:
+        return JSONResponse({'message': 'Application not found'}, status_code=404)
+
+    if app_record.status != 'APPROVED':
+        return JSONResponse({'message': 'Certificate available only for approved applications'}, status_code=400)
+
+    try:
+        if not app_record.certificate_token:
+            app_record.certificate_token, app_record.certificate_issued_at = await run_crypto(
+                _pin_certificate, app_id, int(user_id), user.blind_N)
+
+        etag = certificate_etag(app_record)
+        headers = {'ETag': f'"{etag}"', 'Cache-Control': PRIVATE_CACHE_CONTROL}
+        if etag_matches(request.headers.get('if-none-match'), etag):
+            return Response(status_code=304, headers=headers)
+
+        return JSONResponse(await run_crypto(build_certificate, app_record, user.blind_N), headers=headers)
+    except Exception as e:
+        return JSONResponse({'message': f'Could not generate certificate: {str(e)}'}, status_code=500)
+
+
+app = Starlette(routes=[
+    Route('/api/status/check', api_check_status, methods=['POST']),
+    Route('/api/applications/{app_id}/certificate', api_get_certificate, methods=['GET']),
+    Mount('/', app=WSGIMiddleware(flask_app)),
+])
@@ -0,0 +1,28 @@
+"""
+Daemon threads started lazily, once per process.
+
+Threads do not survive a fork, so each pre-forked gunicorn worker has to
+start its own. ensure_started() is a single pid comparison once the thread
+is running, so it can be called on every request.
+"""
+import os
+import threading
+
+
+class ProcessThread:
+    def __init__(self, target, name):
+        self.target = target
+        self.name = name
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        """Start the thread if this process has none yet. Returns True if it was started by this call."""
+        if self._pid == os.getpid():
+            return False
+        with self._lock:
+            if self._pid == os.getpid():
+                return False
+            self._pid = os.getpid()
+            threading.Thread(target=self.target, name=self.name, daemon=True).start()
+            return True
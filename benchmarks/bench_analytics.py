@@ -0,0 +1,103 @@
+"""
+Benchmark: analytics over a memory-mapped columnar snapshot.
+
+    python benchmarks/bench_analytics.py --rows 1000000 10000000
+
+For each size a synthetic snapshot is written to a temporary directory, then
+load_snapshot + summarize is timed. The endpoint caches the summary per
+snapshot, so this is the cost of the first request after each snapshot.
+For comparison, the cost of decrypting the two encrypted fields per row
+(what computing the same numbers from Application.query.all() would need)
+is measured on a sample and extrapolated.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from cryptography.fernet import Fernet
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import analytics_snapshot  # noqa: E402
+from analytics_snapshot import SnapshotWriter, load_snapshot, summarize  # noqa: E402
+
+CHUNK = 1_000_000
+
+
+def write_synthetic(base_dir, n, seed=0):
+    rng = np.random.default_rng(seed)
+    writer = SnapshotWriter(base_dir, n)
+    for start in range(0, n, CHUNK):
+        m = min(CHUNK, n - start)
+        status = rng.choice(np.array([0, 1, 2], dtype=np.int8), m, p=[0.1, 0.5, 0.4])
+        score = rng.random(m, dtype=np.float32)
+        score[status == 0] = np.nan
+        amount = rng.integers(10_000, 5_000_000, m)
+        writer.append({
+            'status': status,
+            'amount': amount,
+            'term_bucket': rng.integers(-1, 4, m, dtype=np.int8),
+            'model_score': score,
+            'ratio_bucket': np.searchsorted(analytics_snapshot.RATIO_BUCKET_EDGES,
+                                            amount / rng.integers(250_000, 5_000_000, m)).astype(np.int8),
+            'created_at': rng.integers(1_700_000_000, 1_760_000_000, m),
+            'decided_at': rng.integers(1_700_000_000, 1_760_000_000, m),
+        })
+    return writer.commit()
+
+
+def decrypt_cost_per_row(samples=2_000):
+    fernet = Fernet(Fernet.generate_key())
+    tokens = [(fernet.encrypt(b'36'), fernet.encrypt(b'850000')) for _ in range(samples)]
+    start = time.perf_counter()
+    for term, income in tokens:
+        fernet.decrypt(term)
+        fernet.decrypt(income)
+    return (time.perf_counter() - start) / samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    per_row_decrypt = decrypt_cost_per_row()
+
+    for n in args.rows:
+        with tempfile.TemporaryDirectory() as base_dir:
+            start = time.perf_counter()
+            write_synthetic(base_dir, n)
+            write_s = time.perf_counter() - start
+
+            analytics_snapshot._loaded.clear()
+            start = time.perf_counter()
+            _, columns = load_snapshot(base_dir)
+            summarize(columns)
+            first_s = time.perf_counter() - start
+
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                _, columns = load_snapshot(base_dir)
+                summarize(columns)
+                timings.append(time.perf_counter() - start)
+
+            size_mb = sum(os.path.getsize(os.path.join(root, f))
+                          for root, _, files in os.walk(base_dir) for f in files) / 1e6
+            analytics_snapshot._loaded.clear()
+            del columns
+
+        print(f"rows: {n:,}")
+        print(f"  snapshot write:        {write_s:.2f} s ({size_mb:,.0f} MB on disk)")
+        print(f"  first query (mmap):    {first_s * 1000:,.0f} ms")
+        print(f"  warm query (median):   {np.median(timings) * 1000:,.0f} ms")
+        print(f"  per-row decrypt only:  {per_row_decrypt * n:,.0f} s (extrapolated)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""
+Microbenchmarks for every crypto primitive used by the API.
+
+    python benchmarks/bench_crypto.py                     # run, compare with the baseline
+    python benchmarks/bench_crypto.py --save-baseline     # record a new baseline
+    python benchmarks/bench_crypto.py -k pedersen --rounds 20
+
+Each case is timed like timeit: the loop count is calibrated so one round
+takes about --round-ms, the garbage collector is off while timing, and the
+median of --rounds rounds is reported as ops/sec together with the spread
+(coefficient of variation). Allocations are measured in a separate pass
+under tracemalloc, so they do not distort the timings: peak bytes per call
+and bytes still retained after the calls.
+
+Results are compared with benchmarks/crypto_baseline.json. A case fails
+when its median ops/sec drops below the baseline by more than --tolerance,
+or by more than --spread-factor times the larger of the two runs' cv,
+whichever is wider; the script then exits 1. A case that varies 20% between
+rounds cannot show a 25% regression reliably, so its threshold widens
+instead of flapping. Baselines are machine-specific, so record one on the
+machine that runs the check.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from cryptography.fernet import Fernet
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# encryption_utils reads the key at import time
+os.environ.setdefault('ENCRYPTION_KEY', Fernet.generate_key().decode())
+
+import qrcode  # noqa: E402
+
+from blind_signature_utils import blind_message, generate_blind_keys, sign_blinded_message, unblind_signature  # noqa: E402
+from crypto_utils import generate_keys, sign_data, verify_signature  # noqa: E402
+from encryption_utils import decrypt_data, encrypt_data  # noqa: E402
+from zkp_utils import point_to_bytes, pedersen_commit, prove_pedersen_opening, verify_pedersen_opening  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'crypto_baseline.json')
+MESSAGE = b'{"app_id": "3f2b8c1e-0000-4000-8000-000000000000", "status": "APPROVED"}'
+
+
+def build_cases():
+    """name -> zero-argument callable. All inputs are prepared here, outside the timed region."""
+    private_key, public_key = generate_keys()
+    signature = sign_data(private_key, MESSAGE)
+
+    C_point, v, blinding = pedersen_commit(850000)
+    proof = prove_pedersen_opening(C_point, v, blinding)
+    C_hex = point_to_bytes(C_point).hex()
+
+    token = encrypt_data('850000')
+
+    keys = generate_blind_keys()
+    N, e, d = keys['N'], keys['e'], keys['d']
+    blinded, r = blind_message(MESSAGE, N, e)
+    signed_blinded = sign_blinded_message(blinded, N, d)
+
+    return {
+        'pedersen_commit': lambda: pedersen_commit(850000),
+        'prove_pedersen_opening': lambda: prove_pedersen_opening(C_point, v, blinding),
+        'verify_pedersen_opening': lambda: verify_pedersen_opening(C_hex, proof),
+        'sign_data': lambda: sign_data(private_key, MESSAGE),
+        'verify_signature': lambda: verify_signature(public_key, MESSAGE, signature),
+        'encrypt_data': lambda: encrypt_data('850000'),
+        'decrypt_data': lambda: decrypt_data(token),
+        'blind_message': lambda: blind_message(MESSAGE, N, e),
+        'sign_blinded_message': lambda: sign_blinded_message(blinded, N, d),
+        'unblind_signature': lambda: unblind_signature(signed_blinded, r, N),
+        'qrcode_make': lambda: qrcode.make('https://privyloans.example/verify/' + '0' * 64),
+    }
+
+
+def _time_loops(fn, loops):
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter_ns()
+        for _ in range(loops):
+            fn()
+        return time.perf_counter_ns() - start
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def calibrate(fn, round_ms):
+    """Smallest power-of-two loop count whose round takes at least round_ms."""
+    loops = 1
+    while True:
+        if _time_loops(fn, loops) >= round_ms * 1e6 or loops >= 1 << 20:
+            return loops
+        loops *= 2
+
+
+def measure_time(fn, rounds, round_ms):
+    fn()  # warm caches and lazy tables
+    loops = calibrate(fn, round_ms)
+    per_op_ns = [_time_loops(fn, loops) / loops for _ in range(rounds)]
+    ops = [1e9 / ns for ns in per_op_ns]
+    median = statistics.median(ops)
+    stdev = statistics.stdev(ops) if len(ops) > 1 else 0.0
+    return {
+        'ops_per_sec': round(median, 1),
+        'mean_us': round(statistics.mean(per_op_ns) / 1000, 3),
+        'stdev_ops_per_sec': round(stdev, 1),
+        'cv_percent': round(100 * stdev / median, 2) if median else 0.0,
+        'loops': loops,
+        'rounds': rounds,
+    }
+
+
+def measure_allocations(fn, calls):
+    fn()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        peak = 0
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            start, _ = tracemalloc.get_traced_memory()
+            fn()
+            _, call_peak = tracemalloc.get_traced_memory()
+            peak = max(peak, call_peak - start)
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'peak_bytes_per_call': peak, 'retained_bytes': max(0, after - before)}
+
+
+def allowed_drop(result, base, tolerance, spread_factor):
+    """Largest ops/sec drop (as a fraction) still treated as noise for this case."""
+    spread = max(result['cv_percent'], base.get('cv_percent', 0.0)) / 100
+    return max(tolerance, spread_factor * spread)
+
+
+def compare(results, baseline, tolerance, spread_factor):
+    """Returns the names of cases that regressed beyond their allowed drop."""
+    failed = []
+    print(f"\n{'case':26s} {'baseline':>12s} {'now':>12s} {'change':>8s} {'allowed':>8s}")
+    for name, result in results.items():
+        base = baseline.get('cases', {}).get(name)
+        if base is None:
+            print(f"{name:26s} {'-':>12s} {result['ops_per_sec']:12,.1f}      new")
+            continue
+        change = result['ops_per_sec'] / base['ops_per_sec'] - 1
+        allowed = allowed_drop(result, base, tolerance, spread_factor)
+        status = 'REGRESSED' if change < -allowed else ''
+        if status:
+            failed.append(name)
+        print(f"{name:26s} {base['ops_per_sec']:12,.1f} {result['ops_per_sec']:12,.1f} "
+              f"{change:+7.1%} {-allowed:+7.0%} {status}")
+    return failed
+
+
+def environment():
+    return {'python': platform.python_version(), 'machine': platform.machine(), 'system': platform.system()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-k', dest='filter', default='', help='Only run cases whose name contains this')
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--round-ms', type=float, default=50.0)
+    parser.add_argument('--alloc-calls', type=int, default=20)
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed ops/sec drop relative to the baseline (0.25 = 25%%)')
+    parser.add_argument('--spread-factor', type=float, default=2.0,
+                        help='Widen the allowed drop to this many times the cv of noisy cases')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--json', help='Also write the results to this file')
+    args = parser.parse_args()
+
+    cases = {name: fn for name, fn in build_cases().items() if args.filter in name}
+    results = {}
+    print(f"{'case':26s} {'ops/sec':>12s} {'cv':>7s} {'peak/call':>11s} {'retained':>10s}")
+    for name, fn in cases.items():
+        result = measure_time(fn, args.rounds, args.round_ms)
+        result.update(measure_allocations(fn, args.alloc_calls))
+        results[name] = result
+        print(f"{name:26s} {result['ops_per_sec']:12,.1f} {result['cv_percent']:6.1f}% "
+              f"{result['peak_bytes_per_call']:10,d}B {result['retained_bytes']:9,d}B")
+
+    report = {'environment': environment(), 'cases': results}
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        # Saving a filtered run only replaces the cases that were run
+        merged = {**baseline.get('cases', {}), **results}
+        with open(args.baseline, 'w') as f:
+            json.dump({'environment': environment(), 'cases': merged}, f, indent=2)
+            f.write('\n')
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one.")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('environment') != environment():
+        print(f"\nWarning: baseline was recorded on {baseline.get('environment')}, "
+              f"this run is {environment()}")
+    failed = compare(results, baseline, args.tolerance, args.spread_factor)
+    if failed:
+        print(f"\n{len(failed)} case(s) regressed beyond their allowed drop: {', '.join(failed)}")
+        sys.exit(1)
+    print("\nNo regressions beyond the allowed drops.")
+
+
+if __name__ == '__main__':
+    main()
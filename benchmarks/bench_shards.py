@@ -0,0 +1,86 @@
+"""
+Benchmark: application write throughput vs number of SQLite shards.
+
+    python benchmarks/bench_shards.py --shards 1 2 4 8 --writers 8 --rows 4000
+
+Each writer process inserts application-sized rows one transaction at a
+time (like api_apply does), routing each row with the same hash as
+ApplicationShards. With one SQLite file every commit takes the same write
+lock; with N files up to N commits can proceed at once. How much of that
+shows up as throughput depends on the cores and disk available (on a
+single core the gain is small), so run it on the deployment hardware.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+from multiprocessing import Process, Queue
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+
+from database import shard_for, shard_metadata  # noqa: E402
+
+TABLE = shard_metadata.tables['application']
+
+
+def synthetic_row(app_id):
+    blob = os.urandom(96).hex()
+    return {
+        'id': app_id, 'user_id': 1, 'name': 'Bench', 'amount': 250_000,
+        'encrypted_email': blob, 'encrypted_phone': blob, 'encrypted_pan': blob, 'encrypted_age': blob,
+        'encrypted_purpose': blob[:100], 'encrypted_term': blob, 'encrypted_income': blob,
+        'signature': blob * 2, 'commitment': blob, 'proof_t': blob, 'proof_s1': blob, 'proof_s2': blob,
+        'status': 'PENDING',
+    }
+
+
+def writer(urls, rows, results):
+    engines = [create_engine(url, connect_args={'timeout': 60}) for url in urls]
+    start = time.perf_counter()
+    for _ in range(rows):
+        app_id = str(uuid.uuid4())
+        with engines[shard_for(app_id, len(engines))].begin() as conn:
+            conn.execute(insert(TABLE), synthetic_row(app_id))
+    results.put(time.perf_counter() - start)
+
+
+def run(n_shards, writers, rows_per_writer, base_dir):
+    urls = [f'sqlite:///{os.path.join(base_dir, f"shard{i}.db")}' for i in range(n_shards)]
+    for url in urls:
+        engine = create_engine(url)
+        shard_metadata.create_all(engine)
+        engine.dispose()
+
+    results = Queue()
+    procs = [Process(target=writer, args=(urls, rows_per_writer, results)) for _ in range(writers)]
+    start = time.perf_counter()
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - start
+    return writers * rows_per_writer / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--rows', type=int, default=2000, help='Rows per writer')
+    args = parser.parse_args()
+
+    baseline = None
+    for n in args.shards:
+        with tempfile.TemporaryDirectory() as base_dir:
+            rate = run(n, args.writers, args.rows, base_dir)
+        baseline = baseline or rate
+        print(f"shards: {n:2d}  {rate:10,.0f} rows/s  ({rate / baseline:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
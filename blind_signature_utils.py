@@ -97,5 +97,5 @@ def verify_unblinded_signature(signature_int, message_bytes, N, e):
     # Calculate Verification (V): V = S_final^e mod N
     V = pow(signature_int, e, N)
     
-    # Check if V == M
-    return V == M
\ No newline at end of file
+    # Check if V == M (M is only defined mod N)
+    return V == M % N
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""
+Offline verification of approval certificates.
+
+A certificate payload is the JSON encoded in the certificate QR code:
+    {"app_id": ..., "commitment": <hex>, "token": <hex>, "N": "<int>", "e": "<int>"}
+
+The token is valid if token^e mod N matches the hash of the commitment bytes
+(see blind_signature_utils.verify_unblinded_signature).
+
+Usage:
+    python certificate_utils.py certificates.ndjson > results.ndjson
+    cat certificates.ndjson | python certificate_utils.py --processes 8
+
+Each input line produces one output line {"app_id": ..., "valid": true|false}
+(plus "error" when the payload could not be parsed). The exit status is 1 if
+any certificate failed.
+"""
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from blind_signature_utils import verify_unblinded_signature
+
+
+@lru_cache(maxsize=64)
+def parse_public_key(N, e):
+    """Parse (N, e) once; every certificate from one issuer shares the same key."""
+    N, e = int(N), int(e)
+    if N <= 1 or e <= 0:
+        raise ValueError('invalid public key')
+    return N, e
+
+
+def verify_certificate(payload):
+    """Verify one certificate payload (dict or JSON string)."""
+    app_id = None
+    try:
+        if isinstance(payload, (str, bytes)):
+            payload = json.loads(payload)
+        app_id = payload.get('app_id')
+        N, e = parse_public_key(str(payload['N']), str(payload['e']))
+        token = int(payload['token'], 16)
+        message = bytes.fromhex(payload['commitment'])
+    except (ValueError, KeyError, TypeError, AttributeError) as exc:
+        return {'app_id': app_id, 'valid': False, 'error': str(exc)}
+    return {'app_id': app_id, 'valid': verify_unblinded_signature(token, message, N, e)}
+
+
+def _verify_chunk(lines):
+    return [verify_certificate(line) for line in lines]
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def verify_certificates_bulk(payloads, processes=None, chunksize=1000):
+    """
+    Verify an iterable of payloads, yielding results in input order.
+
+    Payloads are sent to worker processes in chunks so the per-task pickling
+    overhead is amortized; processes=1 verifies inline. At most two chunks
+    per process are in flight, so memory stays bounded however long the
+    input stream is.
+    """
+    if processes == 1:
+        for payload in payloads:
+            yield verify_certificate(payload)
+        return
+    processes = processes or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        in_flight = deque()
+        for chunk in _chunks(payloads, chunksize):
+            in_flight.append(pool.submit(_verify_chunk, chunk))
+            if len(in_flight) >= 2 * processes:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', nargs='?', help='NDJSON file of certificate payloads (default: stdin)')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help='Worker processes (1 = inline)')
+    parser.add_argument('--chunksize', type=int, default=1000)
+    args = parser.parse_args()
+
+    source = open(args.input) if args.input else sys.stdin
+    passed = failed = 0
+    try:
+        lines = (line for line in source if line.strip())
+        for result in verify_certificates_bulk(lines, args.processes, args.chunksize):
+            sys.stdout.write(json.dumps(result, separators=(',', ':')) + '\n')
+            if result['valid']:
+                passed += 1
+            else:
+                failed += 1
+    finally:
+        if args.input:
+            source.close()
+
+    print(f"{passed} passed, {failed} failed", file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,14 @@
+import hashlib
+import os
+from datetime import datetime
+
+from flask import g
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy import Column, MetaData, Table, and_, create_engine, delete, func, inspect, insert, select, text, update
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.schema import CreateIndex
 
 db = SQLAlchemy()
 
@@ -7,7 +16,7 @@ class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     password_hash = db.Column(db.String(120), nullable=False)
-    applications = db.relationship('Application', backref='applicant', lazy=True)
+    # Applications may live on other shards: use shards.scalars(), not a relationship
     # --- NEW: MFA fields for standard users ---
     mfa_secret = db.Column(db.String(120), nullable=True)
     mfa_enabled = db.Column(db.Boolean, default=False, nullable=False) 
@@ -34,6 +43,17 @@ class Application(db.Model):
     status = db.Column(db.String(20), default='PENDING', nullable=False)
     blind_signature = db.Column(db.String, nullable=True)
     blinding_factor_r = db.Column(db.String, nullable=True)
+    # Filled in when the model decides the application
+    model_score = db.Column(db.Float, nullable=True)
+    rejection_reasons = db.Column(db.Text, nullable=True)  # JSON list of strings
+    # Unblinded token, precomputed by the bulk certificate issuance job
+    certificate_token = db.Column(db.String, nullable=True)
+    certificate_issued_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=True, default=datetime.utcnow)
+    decided_at = db.Column(db.DateTime, nullable=True)
+    # Duplicate detection for client retries (see api_apply)
+    idempotency_key = db.Column(db.String(128), nullable=True, index=True)
+    submission_hash = db.Column(db.String(64), nullable=True, index=True)
 
 
 class Admin(db.Model, UserMixin):
@@ -46,3 +66,340 @@ class Admin(db.Model, UserMixin):
     blind_priv_d = db.Column(db.String(255), nullable=False)
 
 
+# pg_advisory_xact_lock key serializing upgrade_schema() across workers
+SCHEMA_LOCK_ID = 0x5052_4956
+
+
+def upgrade_schema(engine=None, metadata=None):
+    """Add nullable columns and indexes introduced after a table was first created.
+
+    db.create_all() only creates missing tables, so existing databases would
+    otherwise miss new optional columns. Defaults to the main database; call
+    inside an app context.
+
+    Every worker runs this at startup, so the schema is inspected only after
+    taking the database's write lock, and a column or index another process
+    added in the meantime counts as done.
+    """
+    engine = engine if engine is not None else db.engine
+    metadata = metadata if metadata is not None else db.metadata
+    with engine.connect() as conn:
+        _lock_schema(conn)
+        inspector = inspect(conn)
+        for table in metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {col['name'] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                _apply_ddl(conn, text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {col_type}'))
+            existing_indexes = {ix['name'] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    _apply_ddl(conn, CreateIndex(index, if_not_exists=True))
+        conn.commit()
+
+
+def _lock_schema(conn):
+    """Start a transaction holding the lock other upgrading workers wait on."""
+    if conn.dialect.name == 'sqlite':
+        conn.exec_driver_sql('BEGIN IMMEDIATE')
+    elif conn.dialect.name == 'postgresql':
+        conn.exec_driver_sql(f'SELECT pg_advisory_xact_lock({SCHEMA_LOCK_ID})')
+
+
+def _apply_ddl(conn, statement):
+    try:
+        with conn.begin_nested():
+            conn.execute(statement)
+    except (OperationalError, ProgrammingError) as e:
+        # Added by a process that does not take the lock (or a database without one)
+        if 'duplicate column' not in str(e) and 'already exists' not in str(e):
+            raise
+
+
+# ============ APPLICATION SHARDING ============
+
+# Extra shards only hold the application table, without the foreign key to
+# user (which lives on the main database)
+shard_metadata = MetaData()
+Table(
+    Application.__table__.name, shard_metadata,
+    *[Column(col.name, col.type, primary_key=col.primary_key, nullable=col.nullable, index=col.index)
+      for col in Application.__table__.columns]
+)
+
+# Times a rebalance re-copies a row that keeps changing before leaving it in place
+REBALANCE_ATTEMPTS = 5
+# Rows checked per query when listings drop copies left behind by a rebalance
+REBALANCE_LISTING_CHUNK = 500
+
+
+def _unchanged(table, row):
+    """WHERE clause matching `row` only if every column still has the value read."""
+    return and_(*(column.is_(None) if row[column.name] is None else column == row[column.name]
+                  for column in table.c))
+
+
+def jump_hash(key, buckets):
+    """Jump consistent hash (Lamping & Veach): growing N -> N+1 moves only 1/(N+1) of the keys."""
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return b
+
+
+def shard_for(app_id, count):
+    key = int.from_bytes(hashlib.blake2b(app_id.encode(), digest_size=8).digest(), 'big')
+    return jump_hash(key, count)
+
+
+class ApplicationShards:
+    """
+    Routes Application rows to N databases by a hash of the application id.
+
+    Shard 0 is the main database and db.session. Shards 1..N-1 are the URLs
+    in app.config['APPLICATION_SHARDS'], registered as Flask-SQLAlchemy binds
+    'shard1', 'shard2', ..., so call init_app() before db.init_app(). With no
+    extra shards everything goes through db.session as before.
+
+    Set app.config['APPLICATION_SHARDS_REBALANCING'] on every worker while
+    rebalance() runs: only then do lookups that miss their home shard also
+    try the other shards, where a row may not have been moved yet.
+
+    Lookups by id touch one shard; listings scatter the query over every
+    shard and concatenate the results. commit() and rollback() cover every
+    session used in the current app context, one shard at a time (there is
+    no cross-shard transaction).
+    """
+
+    def __init__(self):
+        self.count = 1
+        self.rebalancing = False
+
+    @staticmethod
+    def config_from_env(config):
+        """Set the shard settings in `config` from APPLICATION_SHARD_URLS / APPLICATION_SHARD_REBALANCING."""
+        # Extra databases for the application table; shard 0 is SQLALCHEMY_DATABASE_URI
+        config['APPLICATION_SHARDS'] = [url.strip() for url in os.getenv('APPLICATION_SHARD_URLS', '').split(',')
+                                        if url.strip()]
+        # Set on every worker while `flask --app api rebalance-shards` runs
+        config['APPLICATION_SHARDS_REBALANCING'] = os.getenv('APPLICATION_SHARD_REBALANCING', 'false').lower() == 'true'
+
+    def init_app(self, app):
+        urls = app.config.get('APPLICATION_SHARDS') or []
+        self.rebalancing = bool(app.config.get('APPLICATION_SHARDS_REBALANCING'))
+        binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+        for i, url in enumerate(urls, start=1):
+            binds[f'shard{i}'] = url
+        self.count = 1 + len(urls)
+        app.teardown_appcontext(self._close_sessions)
+
+    @staticmethod
+    def engine(shard):
+        return db.engine if shard == 0 else db.engines[f'shard{shard}']
+
+    def shard_for(self, app_id):
+        return shard_for(app_id, self.count)
+
+    def session(self, shard):
+        if shard == 0:
+            return db.session
+        sessions = g.setdefault('_application_shard_sessions', {})
+        if shard not in sessions:
+            sessions[shard] = Session(self.engine(shard))
+        return sessions[shard]
+
+    def sessions(self):
+        return [self.session(shard) for shard in range(self.count)]
+
+    def _close_sessions(self, exc):
+        for sess in g.pop('_application_shard_sessions', {}).values():
+            sess.close()
+
+    def create_all(self):
+        """Create and upgrade the application table on the extra shards."""
+        for shard in range(1, self.count):
+            shard_metadata.create_all(self.engine(shard))
+            upgrade_schema(self.engine(shard), shard_metadata)
+
+    # --- reads ---
+
+    def get(self, app_id, user_id=None):
+        """Application by id (optionally owned by user_id), or None."""
+        if not app_id or not isinstance(app_id, str):
+            return None  # ids are UUID strings; anything else (e.g. from a JSON body) matches nothing
+        home = self.shard_for(app_id)
+        app_record = self.session(home).get(Application, app_id)
+        if app_record is None and self.rebalancing:
+            # Rows not yet moved by the ongoing rebalance are still on their old shard
+            for shard in range(self.count):
+                if shard != home:
+                    app_record = self.session(shard).get(Application, app_id)
+                    if app_record is not None:
+                        break
+        if app_record is not None and user_id is not None and app_record.user_id != user_id:
+            return None
+        return app_record
+
+    def scalars(self, stmt):
+        """Run an ORM select on every shard and yield the results, shard by shard."""
+        for shard, sess in enumerate(self.sessions()):
+            result = sess.execute(stmt).scalars()
+            if not self.rebalancing:
+                yield from result
+                continue
+            for part in result.partitions(REBALANCE_LISTING_CHUNK):
+                moved = self._copied_home(shard, part)
+                yield from (app_record for app_record in part if app_record.id not in moved)
+
+    def first(self, stmt):
+        for shard, sess in enumerate(self.sessions()):
+            result = sess.execute(stmt.limit(1)).scalars().first()
+            if result is not None:
+                if self.rebalancing and self._copied_home(shard, [result]):
+                    # Already copied to its home shard: that copy is the live one
+                    return self.session(self.shard_for(result.id)).get(Application, result.id)
+                return result
+        return None
+
+    def count_rows(self, *criteria):
+        if self.rebalancing:
+            # A row being moved is on two shards for a moment; count it once
+            stmt = select(Application.id).where(*criteria)
+            return len({app_id for sess in self.sessions() for app_id in sess.execute(stmt).scalars()})
+        stmt = select(func.count()).select_from(Application).where(*criteria)
+        return sum(sess.execute(stmt).scalar() for sess in self.sessions())
+
+    def _copied_home(self, shard, records):
+        """Ids among `records` (read from `shard`) that also exist on their home shard."""
+        strays = {}
+        for app_record in records:
+            home = self.shard_for(app_record.id)
+            if home != shard:
+                strays.setdefault(home, []).append(app_record.id)
+        found = set()
+        for home, ids in strays.items():
+            found.update(self.session(home).execute(
+                select(Application.id).where(Application.id.in_(ids))).scalars())
+        return found
+
+    # --- writes ---
+
+    def add(self, app_record):
+        self.session(self.shard_for(app_record.id)).add(app_record)
+
+    @staticmethod
+    def delete(app_record):
+        object_session(app_record).delete(app_record)
+
+    def commit(self):
+        db.session.commit()
+        for sess in g.get('_application_shard_sessions', {}).values():
+            sess.commit()
+
+    def rollback(self):
+        db.session.rollback()
+        for sess in g.get('_application_shard_sessions', {}).values():
+            sess.rollback()
+
+    # --- rebalancing ---
+
+    def rebalance(self, drain_urls=(), batch_size=1000, attempts=REBALANCE_ATTEMPTS):
+        """
+        Move every row to the shard it hashes to under the current shard count.
+
+        Run after adding shards to APPLICATION_SHARDS, with
+        APPLICATION_SHARDS_REBALANCING set on every worker. To retire shards,
+        remove them from the config and pass their URLs as drain_urls.
+
+        Each row is copied to its home shard first, then deleted from the
+        source only if it still holds the values that were copied. A row
+        written in between is copied again (up to `attempts` times), so
+        writes made while the rebalance runs are not lost. A row that is
+        already on its home shard (left by an interrupted run) is not
+        overwritten: that copy is the one lookups have been returning.
+        Rows on drained shards are not visible to the app until moved.
+
+        Returns ({(source, target): rows moved}, [ids left in place]). Rows are
+        left in place when they kept changing, or were changed on both
+        shards at once; run again to move them.
+        """
+        table = Application.__table__
+        sources = [(shard, self.engine(shard)) for shard in range(self.count)]
+        sources += [(url, create_engine(url)) for url in drain_urls]
+        moved, skipped = {}, []
+        for source, engine in sources:
+            last_id = ''
+            while True:
+                with engine.connect() as conn:
+                    rows = conn.execute(
+                        select(table).where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+                    ).mappings().all()
+                if not rows:
+                    break
+                last_id = rows[-1]['id']
+
+                by_target = {}
+                for row in rows:
+                    target = self.shard_for(row['id'])
+                    if target != source:
+                        by_target.setdefault(target, []).append(dict(row))
+                for target, batch in by_target.items():
+                    done, left = self._copy_rows(engine, self.engine(target), batch, attempts)
+                    if done:
+                        moved[(source, target)] = moved.get((source, target), 0) + done
+                    skipped += left
+            if isinstance(source, str):
+                engine.dispose()
+        return moved, skipped
+
+    @staticmethod
+    def _copy_rows(source, target, batch, attempts):
+        """Copy a batch, then compare-and-delete it from the source. Returns (rows moved, ids skipped)."""
+        table = Application.__table__
+        ids = [row['id'] for row in batch]
+        with target.begin() as conn:
+            present = set(conn.execute(select(table.c.id).where(table.c.id.in_(ids))).scalars())
+            copies = [row for row in batch if row['id'] not in present]
+            if copies:
+                conn.execute(insert(table), copies)
+
+        done, conflicts = 0, []
+        for _ in range(attempts):
+            changed = []
+            with source.begin() as conn:
+                for row in batch:
+                    if conn.execute(delete(table).where(_unchanged(table, row))).rowcount:
+                        done += 1
+                    else:
+                        changed.append(row)
+            if not changed:
+                return done, conflicts
+
+            # Written (or deleted) on the source after it was read: bring the copy up to date
+            with source.connect() as conn:
+                current = {row['id']: dict(row) for row in conn.execute(
+                    select(table).where(table.c.id.in_([row['id'] for row in changed]))).mappings()}
+            batch = []
+            with target.begin() as conn:
+                for row in changed:
+                    latest = current.get(row['id'])
+                    if latest is None:
+                        conn.execute(delete(table).where(_unchanged(table, row)))
+                    elif row['id'] not in present and \
+                            conn.execute(update(table).where(_unchanged(table, row)).values(latest)).rowcount:
+                        batch.append(latest)
+                    else:
+                        # Both copies have writes of their own: leave them for a rerun
+                        conflicts.append(row['id'])
+            if not batch:
+                return done, conflicts
+        return done, conflicts + [row['id'] for row in batch]
+
+
+shards = ApplicationShards()
@@ -1,4 +1,6 @@
 import os
+import hmac
+import hashlib
 from cryptography.fernet import Fernet
 
 # This block will attempt to load the key when the file is imported by app.py.
@@ -19,6 +21,15 @@ def encrypt_data(data: str) -> str:
         return ""
     return fernet.encrypt(data.encode()).decode()
 
+def keyed_hash(data: str) -> str:
+    """HMAC-SHA256 of a string, for indexing values without storing them in clear."""
+    if fernet is None:
+        raise RuntimeError("Encryption key not loaded. Ensure ENCRYPTION_KEY environment variable is set.")
+    # Derived from ENCRYPTION_KEY so it is identical across workers but never equals it
+    key = os.environ.get("SUBMISSION_HMAC_KEY", "").encode() or \
+        hmac.new(ENCRYPTION_KEY, b"privyloans-index-v1", hashlib.sha256).digest()
+    return hmac.new(key, data.encode(), hashlib.sha256).hexdigest()
+
 def decrypt_data(encrypted_data: str) -> str:
     """Decrypts an encrypted string and returns it."""
     if fernet is None:
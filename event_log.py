@@ -0,0 +1,274 @@
+"""
+Append-only audit log of application events, written behind the request.
+
+Request threads call emit(), which only appends a dict to an in-memory ring
+buffer. A daemon thread per process drains the buffer every
+FLUSH_INTERVAL seconds (or as soon as BATCH_SIZE events are waiting), writes
+the batch as NDJSON lines with a single write() and fsyncs once per batch.
+
+Each process appends to its own segment files, named
+<start time>-<pid>.ndjson, and rolls to a new segment at SEGMENT_BYTES.
+Segments are never rewritten, so they can be shipped or archived as they are.
+replay() merges all segments back into time order. To read the log from
+the command line:
+
+    python event_log.py --dir instance/events --app-id <id>
+
+If the writer falls more than CAPACITY events behind, the oldest buffered
+events are dropped and counted in `dropped`. That is the trade for never
+blocking a request on disk.
+"""
+import argparse
+import atexit
+import glob
+import heapq
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from itertools import chain
+from datetime import datetime, timezone
+
+from background import ProcessThread
+
+log = logging.getLogger(__name__)
+
+CAPACITY = 100_000
+BATCH_SIZE = 1_000
+FLUSH_INTERVAL = 0.5
+SEGMENT_BYTES = 64 * 1024 * 1024
+
+
+class EventLog:
+    def __init__(self, directory, capacity=CAPACITY, batch_size=BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL, segment_bytes=SEGMENT_BYTES, fsync=True):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.dropped = 0
+        self._buffer = deque(maxlen=capacity)
+        self._wake = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._writer = ProcessThread(self._run, 'event-log')
+        self._segment = None
+        self._segment_pid = None
+
+    # --- hot path ---
+
+    def emit(self, event_type, **fields):
+        """Queue an event. Never touches the disk."""
+        fields['type'] = event_type
+        fields['ts'] = time.time()
+        buffer = self._buffer
+        if len(buffer) == buffer.maxlen:
+            self.dropped += 1
+        buffer.append(fields)
+        if len(buffer) == self.batch_size:
+            self._wake.set()
+        if self._writer.ensure_started():
+            atexit.register(self._flush_logged)
+
+    # --- writer ---
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._flush_logged()
+
+    def _flush_logged(self):
+        try:
+            self.flush()
+        except OSError as e:
+            log.warning("Could not write events to %s (kept in memory for retry): %s", self.directory, e)
+
+    def _open_segment(self):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')}-{os.getpid()}.ndjson"
+        self._segment = open(os.path.join(self.directory, name), 'ab')
+        self._segment_pid = os.getpid()
+
+    def flush(self):
+        """Write every buffered event to disk. Returns the number written."""
+        with self._flush_lock:
+            written = 0
+            while self._buffer:
+                batch = []
+                try:
+                    for _ in range(self.batch_size):
+                        batch.append(self._buffer.popleft())
+                except IndexError:
+                    pass
+                if not batch:
+                    break
+
+                data = ''.join(json.dumps(event, separators=(',', ':'), default=str) + '\n'
+                               for event in batch).encode()
+                try:
+                    if self._segment is None or self._segment_pid != os.getpid() \
+                            or self._segment.tell() >= self.segment_bytes:
+                        if self._segment is not None and self._segment_pid == os.getpid():
+                            self._segment.close()
+                        self._open_segment()
+                    self._segment.write(data)
+                    self._segment.flush()
+                    if self.fsync:
+                        os.fsync(self._segment.fileno())
+                except OSError:
+                    self._requeue(batch)
+                    raise
+                written += len(batch)
+            return written
+
+    def _requeue(self, batch):
+        # Put a failed batch back in front of the buffer; whatever no longer fits is dropped, oldest first
+        available = self._buffer.maxlen - len(self._buffer)
+        if available < len(batch):
+            self.dropped += len(batch) - available
+            batch = batch[len(batch) - available:] if available > 0 else []
+        self._buffer.extendleft(reversed(batch))
+        # The failed write may have left a torn line: continue in a fresh segment
+        if self._segment is not None and self._segment_pid == os.getpid():
+            try:
+                self._segment.close()
+            except OSError:
+                pass
+        self._segment = None
+
+    # --- reading ---
+
+    def _segments(self):
+        """Segment paths grouped by writer pid, each group in time order."""
+        by_pid = {}
+        for path in sorted(glob.glob(os.path.join(self.directory, '*.ndjson'))):
+            started, _, pid = os.path.basename(path)[:-len('.ndjson')].partition('-')
+            by_pid.setdefault(pid, []).append((started, path))
+        return by_pid.values()
+
+    @staticmethod
+    def _parse(line):
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None  # torn final line after a crash
+
+    def _read_segment(self, path):
+        with open(path, 'rb') as f:
+            for line in f:
+                event = self._parse(line)
+                if event is not None:
+                    yield event
+
+    def _read_segment_reversed(self, path, block_size=64 * 1024):
+        with open(path, 'rb') as f:
+            position = f.seek(0, os.SEEK_END)
+            partial = b''
+            while position > 0:
+                size = min(block_size, position)
+                position -= size
+                f.seek(position)
+                lines = (f.read(size) + partial).split(b'\n')
+                # The first piece may continue in the previous block
+                partial = lines.pop(0)
+                for line in reversed(lines):
+                    event = self._parse(line) if line else None
+                    if event is not None:
+                        yield event
+            event = self._parse(partial) if partial else None
+            if event is not None:
+                yield event
+
+    @staticmethod
+    def _time_key(ts):
+        return datetime.fromtimestamp(ts, timezone.utc).strftime('%Y%m%dT%H%M%S%fZ') if ts else None
+
+    def _streams(self, since, until, newest_first=False):
+        """One event stream per writer process, covering only segments that can overlap [since, until]."""
+        since_key, until_key = self._time_key(since), self._time_key(until)
+        streams = []
+        for segments in self._segments():
+            paths = []
+            for i, (started, path) in enumerate(segments):
+                # A segment ends where the next one from the same process starts
+                if since_key and i + 1 < len(segments) and segments[i + 1][0] <= since_key:
+                    continue
+                if until_key and started > until_key:
+                    break
+                paths.append(path)
+            if newest_first:
+                streams.append(chain.from_iterable(self._read_segment_reversed(p) for p in reversed(paths)))
+            else:
+                streams.append(chain.from_iterable(self._read_segment(p) for p in paths))
+        return streams
+
+    @staticmethod
+    def _matches(event, since, until, types, app_id):
+        ts = event.get('ts', 0)
+        if since is not None and ts < since:
+            return False
+        if until is not None and ts > until:
+            return False
+        if types and event.get('type') not in types:
+            return False
+        return app_id is None or event.get('app_id') == app_id
+
+    def replay(self, since=None, until=None, types=None, app_id=None):
+        """
+        Yield logged events in time order, optionally filtered.
+
+        since / until are unix timestamps; types is a collection of event
+        types. Events still in this process's buffer are flushed first.
+        """
+        self.flush()
+        for event in heapq.merge(*self._streams(since, until), key=_event_time):
+            if self._matches(event, since, until, types, app_id):
+                yield event
+
+    def query(self, limit=100, since=None, until=None, types=None, app_id=None):
+        """
+        The most recent `limit` events matching replay() filters, oldest first.
+
+        Segments are read backwards from the newest event, so the cost depends
+        on how far back the matches are, not on the size of the whole log.
+        """
+        self.flush()
+        found = []
+        if limit <= 0:
+            return found
+        streams = self._streams(since, until, newest_first=True)
+        for event in heapq.merge(*streams, key=_event_time, reverse=True):
+            if since is not None and event.get('ts', 0) < since:
+                break
+            if self._matches(event, since, until, types, app_id):
+                found.append(event)
+                if len(found) >= limit:
+                    break
+        found.reverse()
+        return found
+
+
+def _event_time(event):
+    return event.get('ts', 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dir', default=os.path.join('instance', 'events'))
+    parser.add_argument('--app-id')
+    parser.add_argument('--type', action='append', dest='types', help='Event type (repeatable)')
+    parser.add_argument('--since', type=float, help='Unix timestamp')
+    parser.add_argument('--until', type=float, help='Unix timestamp')
+    args = parser.parse_args()
+
+    events = EventLog(args.dir)
+    for event in events.replay(since=args.since, until=args.until, types=args.types, app_id=args.app_id):
+        sys.stdout.write(json.dumps(event) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Simple concurrent load generator for comparing serving modes.
+
+Start the server under test, then point this script at it, e.g.
+
+    gunicorn api:app -w 2 -b 127.0.0.1:8000                                  # sync workers
+    gunicorn asgi:app -w 2 -k uvicorn.workers.UvicornWorker -b 127.0.0.1:8001  # ASGI
+
+    python loadtest.py --url http://127.0.0.1:8000 --app-id <id> -c 64 -n 2000
+    python loadtest.py --url http://127.0.0.1:8001 --app-id <id> -c 64 -n 2000
+
+Add --cookie 'session=...' together with --certificate to load the
+certificate endpoint for a logged-in user instead of the public status check.
+Both modes enforce the app's default rate limits per client, so keep -n below
+them or start the servers with RATELIMIT_ENABLED=false in the environment.
+"""
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+
+def make_request_fn(args):
+    target = urlparse(args.url)
+    local = threading.local()
+
+    if args.certificate:
+        method, path, body = 'GET', f'/api/applications/{args.app_id}/certificate', None
+    else:
+        method, path, body = 'POST', '/api/status/check', json.dumps({'app_id': args.app_id})
+    headers = {'Content-Type': 'application/json'}
+    if args.cookie:
+        headers['Cookie'] = args.cookie
+
+    def do_request():
+        # One keep-alive connection per client thread
+        conn = getattr(local, 'conn', None)
+        if conn is None:
+            conn = local.conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=60)
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            status = resp.status
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            local.conn = None
+            status = 0
+        return status, time.perf_counter() - start
+
+    return do_request
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', required=True, help='Base URL of the server under test')
+    parser.add_argument('--app-id', required=True, help='Application id to query')
+    parser.add_argument('--certificate', action='store_true', help='Load the certificate endpoint')
+    parser.add_argument('--cookie', help='Cookie header to send (needed for --certificate)')
+    parser.add_argument('-c', '--concurrency', type=int, default=32)
+    parser.add_argument('-n', '--requests', type=int, default=1000)
+    args = parser.parse_args()
+
+    do_request = make_request_fn(args)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda _: do_request(), range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(lat * 1000 for _, lat in results)
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+
+    print(f"Target:      {args.url} ({'certificate' if args.certificate else 'status check'})")
+    print(f"Requests:    {args.requests} @ concurrency {args.concurrency}")
+    print(f"Statuses:    {dict(sorted(statuses.items()))}")
+    print(f"Throughput:  {args.requests / elapsed:.1f} req/s")
+    print(f"Latency ms:  mean {statistics.mean(latencies):.1f}  p50 {percentile(latencies, 50):.1f}  "
+          f"p95 {percentile(latencies, 95):.1f}  p99 {percentile(latencies, 99):.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+TOTP verification with per-user code caches and a replay guard.
+
+Codes are RFC 6238 TOTP (HMAC-SHA1, 6 digits, 30 s steps), the same codes
+pyotp and authenticator apps produce. Instead of building a pyotp.TOTP and
+recomputing three HMACs on every attempt, the service keeps each user's
+decoded secret and the codes for the accepted window (current step +/- 1).
+A new step costs one HMAC per user (the neighbouring codes are already
+known), so a verification is a dict lookup.
+
+Accepted codes are recorded in the shared state backend with add(), keyed by
+user and time step, so a code can be used once across all workers. The
+records expire with the window, which keeps the replay cache bounded.
+"""
+import base64
+import hashlib
+import hmac
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+INTERVAL = 30
+DIGITS = 6
+VALID_WINDOW = 1
+# Users whose secrets and codes are kept in memory (least recently used are evicted)
+MAX_CACHED_USERS = 10_000
+
+
+def decode_secret(secret):
+    secret = secret.replace(' ', '').upper()
+    return base64.b32decode(secret + '=' * (-len(secret) % 8))
+
+
+def totp_code(key, step):
+    """RFC 4226 HOTP value for `step` (the TOTP counter)."""
+    digest = hmac.new(key, struct.pack('>Q', step), hashlib.sha1).digest()
+    offset = digest[-1] & 0x0F
+    value = struct.unpack('>I', digest[offset:offset + 4])[0] & 0x7FFFFFFF
+    return str(value % 10 ** DIGITS).zfill(DIGITS)
+
+
+class _UserCodes:
+    __slots__ = ('secret', 'key', 'codes')
+
+    def __init__(self, secret):
+        self.secret = secret
+        self.key = decode_secret(secret)
+        self.codes = {}  # step -> code
+
+    def window(self, step):
+        """code -> step for every step accepted at `step`."""
+        wanted = range(step - VALID_WINDOW, step + VALID_WINDOW + 1)
+        for s in list(self.codes):
+            if s not in wanted:
+                del self.codes[s]
+        for s in wanted:
+            if s not in self.codes:
+                self.codes[s] = totp_code(self.key, s)
+        return {code: s for s, code in self.codes.items()}
+
+
+class MFAService:
+    def __init__(self, state, max_users=MAX_CACHED_USERS):
+        self.state = state
+        self.max_users = max_users
+        self._users = OrderedDict()  # cache key -> _UserCodes
+        self._windows = {}           # cache key -> (step, {code: step})
+        self._lock = threading.Lock()
+
+    def _valid_codes(self, cache_key, secret, step):
+        with self._lock:
+            user = self._users.get(cache_key)
+            if user is None or user.secret != secret:
+                user = _UserCodes(secret)
+                self._users[cache_key] = user
+                self._windows.pop(cache_key, None)
+                if len(self._users) > self.max_users:
+                    evicted, _ = self._users.popitem(last=False)
+                    self._windows.pop(evicted, None)
+            else:
+                self._users.move_to_end(cache_key)
+
+            cached = self._windows.get(cache_key)
+            if cached is None or cached[0] != step:
+                cached = (step, user.window(step))
+                self._windows[cache_key] = cached
+            return cached[1]
+
+    def verify(self, cache_key, secret, code, now=None):
+        """
+        Check `code` against `secret` and consume it.
+
+        `cache_key` identifies the secret's owner (e.g. the user id); a code
+        accepted once for that owner is rejected for the rest of its window.
+        """
+        if not secret or not code:
+            return False
+        code = str(code).strip()
+        step = int((time.time() if now is None else now) // INTERVAL)
+        matched_step = self._valid_codes(cache_key, secret, step).get(code)
+        if matched_step is None:
+            return False
+        # Each step's code is unique to the user; the record outlives every window it is valid in
+        return self.state.add(f'mfa:used:{cache_key}:{matched_step}', '1',
+                              ttl=INTERVAL * (2 * VALID_WINDOW + 2))
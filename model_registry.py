@@ -0,0 +1,96 @@
+import json
+import logging
+import os
+import time
+from collections import namedtuple
+
+import joblib
+
+from background import ProcessThread
+
+log = logging.getLogger(__name__)
+
+LoadedModel = namedtuple('LoadedModel', ['model', 'scaler', 'version'])
+
+EMPTY = LoadedModel(None, None, None)
+
+
+class ModelRegistry:
+    """
+    Holds the current model/scaler pair and hot-swaps it when the artifacts change.
+
+    A daemon thread polls model_manifest.json (written by train_pipeline.py)
+    or, when there is no manifest, the mtimes of the joblib files. A new
+    version is loaded entirely in that thread and then published with a
+    single reference assignment, so request threads calling current() never
+    wait on a reload and always see a consistent model/scaler pair.
+
+    Arrays are loaded with mmap_mode='r' so workers on the same host share
+    the page cache instead of each holding a private copy.
+    """
+
+    def __init__(self, model_path, scaler_path, manifest_path=None, poll_interval=30.0):
+        self.model_path = model_path
+        self.scaler_path = scaler_path
+        self.manifest_path = manifest_path
+        self.poll_interval = poll_interval
+        self._current = EMPTY
+        self._signature = None
+        self._watcher = ProcessThread(self._watch, 'model-registry')
+
+    def current(self):
+        self._ensure_watcher()
+        return self._current
+
+    def load(self):
+        """Load the current artifacts synchronously (used once at startup)."""
+        self._reload_if_changed()
+        return self._current
+
+    def _read_manifest(self):
+        if not self.manifest_path or not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def _artifact_signature(self):
+        manifest = self._read_manifest()
+        if manifest is not None:
+            base = os.path.dirname(os.path.abspath(self.manifest_path))
+            return (manifest['version'],
+                    os.path.join(base, manifest['model']),
+                    os.path.join(base, manifest['scaler']))
+        mtimes = tuple(os.stat(p).st_mtime_ns for p in (self.model_path, self.scaler_path))
+        return (mtimes, self.model_path, self.scaler_path)
+
+    def _reload_if_changed(self):
+        try:
+            signature = self._artifact_signature()
+        except (OSError, ValueError, KeyError) as e:
+            log.warning("Could not read model artifacts: %s", e)
+            return False
+        if signature == self._signature:
+            return False
+
+        version, model_path, scaler_path = signature
+        try:
+            model = joblib.load(model_path, mmap_mode='r')
+            scaler = joblib.load(scaler_path, mmap_mode='r')
+        except Exception as e:
+            # Keep serving the previous model if the new one is unreadable
+            log.warning("Could not load model from %s: %s", model_path, e)
+            return False
+
+        self._current = LoadedModel(model, scaler, version if isinstance(version, str) else None)
+        self._signature = signature
+        log.info("Loaded model version %s", self._current.version or model_path)
+        return True
+
+    def _ensure_watcher(self):
+        if self.poll_interval:
+            self._watcher.ensure_started()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            self._reload_if_changed()
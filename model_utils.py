@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+# Column order the model and scaler were trained on (see train_model.py)
+FEATURE_COLUMNS = [
+    'Age',
+    'Income',
+    'Credit_Score',
+    'Loan_Amount',
+    'Loan_Term',
+    'Employment_Status_Unemployed'
+]
+
+# The application form does not collect these yet, so every row gets the same
+# placeholder value. They are left out of the explanations because they say
+# nothing about the applicant.
+PLACEHOLDER_FEATURES = {
+    'Credit_Score': 750,
+    'Employment_Status_Unemployed': 0,
+}
+
+FEATURE_LABELS = {
+    'Age': 'Applicant age',
+    'Income': 'Annual income',
+    'Loan_Amount': 'Requested loan amount',
+    'Loan_Term': 'Loan term',
+}
+
+GENERIC_REASON = "The ML model predicted high credit risk based on the input factors."
+
+
+def build_feature_frame(rows):
+    """Build the model input for an iterable of (age, income, amount, term) tuples."""
+    rows = np.asarray(list(rows), dtype=np.float64).reshape(-1, 4)
+    n = len(rows)
+    return pd.DataFrame({
+        'Age': rows[:, 0],
+        'Income': rows[:, 1],
+        'Credit_Score': np.full(n, PLACEHOLDER_FEATURES['Credit_Score'], dtype=np.float64),
+        'Loan_Amount': rows[:, 2],
+        'Loan_Term': rows[:, 3],
+        'Employment_Status_Unemployed': np.full(n, PLACEHOLDER_FEATURES['Employment_Status_Unemployed'], dtype=np.float64),
+    }, columns=FEATURE_COLUMNS)
+
+
+def _reason_text(feature, z):
+    direction = 'above' if z > 0 else 'below'
+    return f"{FEATURE_LABELS[feature]} is {direction} average, which lowered the approval score."
+
+
+def predict_with_explanations(model, scaler, features, top_k=3):
+    """
+    Predict a whole batch and attribute each decision to its features.
+
+    For a linear model the log-odds are intercept + sum(coef * scaled_feature),
+    so coef * scaled_feature is exactly how much each feature moved the score.
+    Returns (predictions, approval_scores, reasons) where reasons[i] lists the
+    features that pushed row i hardest towards rejection, most negative first
+    (empty for approved rows).
+    """
+    scaled = scaler.transform(features) if scaler is not None else np.asarray(features, dtype=np.float64)
+    scaled = np.asarray(scaled, dtype=np.float64)
+
+    predictions = model.predict(scaled)
+    scores = model.predict_proba(scaled)[:, 1]
+
+    explained = [i for i, col in enumerate(FEATURE_COLUMNS) if col in FEATURE_LABELS]
+    contributions = scaled[:, explained] * model.coef_[0, explained]
+    order = np.argsort(contributions, axis=1)[:, :top_k]
+
+    names = [FEATURE_COLUMNS[i] for i in explained]
+    reasons = []
+    for row, idx in enumerate(order):
+        if predictions[row] == 1:
+            reasons.append([])
+            continue
+        row_reasons = [
+            _reason_text(names[j], scaled[row, explained[j]])
+            for j in idx if contributions[row, j] < 0
+        ]
+        reasons.append(row_reasons or [GENERIC_REASON])
+    return predictions, scores, reasons
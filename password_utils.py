@@ -0,0 +1,205 @@
+"""
+Password hashing with a configurable algorithm and cost.
+
+    PASSWORD_HASH_ALGORITHM   bcrypt (default) | argon2 | scrypt
+    PASSWORD_HASH_COST        bcrypt: log2 rounds (default 12)
+                              scrypt: log2 N       (default 15, r=8, p=1)
+                              argon2: time cost    (default 3, 64 MiB; needs argon2-cffi)
+    PASSWORD_HASH_THREADS     hashing threads (default: CPU count)
+
+Hashing runs on a bounded thread pool rather than the request thread: all
+three algorithms release the GIL, and the pool caps how many hashes compete
+for CPU during login bursts. verify_password() reports when a stored hash
+was made with another algorithm or cost, so callers can rewrite it after a
+successful login (in either direction, so a cheaper calibrated cost reaches
+existing users too).
+
+Pick a cost for the target latency on the production box with:
+    python password_utils.py --calibrate --target-ms 250
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+try:
+    from argon2 import PasswordHasher as Argon2Hasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+except ImportError:  # only needed when PASSWORD_HASH_ALGORITHM=argon2
+    Argon2Hasher = None
+
+DEFAULT_COSTS = {'bcrypt': 12, 'scrypt': 15, 'argon2': 3}
+ARGON2_MEMORY_KIB = 64 * 1024
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+ALGORITHM = os.getenv('PASSWORD_HASH_ALGORITHM', 'bcrypt').lower()
+COST = int(os.getenv('PASSWORD_HASH_COST', DEFAULT_COSTS.get(ALGORITHM, 12)))
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('PASSWORD_HASH_THREADS', os.cpu_count() or 4)),
+    thread_name_prefix='password-hash'
+)
+
+
+def _b64(data):
+    return base64.b64encode(data).decode().rstrip('=')
+
+
+def _unb64(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+def _bcrypt_secret(password):
+    # bcrypt only uses the first 72 bytes; newer releases raise instead of truncating
+    return password.encode('utf-8')[:72]
+
+
+def _argon2(cost):
+    if Argon2Hasher is None:
+        raise RuntimeError("argon2 password hashing requires the 'argon2-cffi' package.")
+    return Argon2Hasher(time_cost=cost, memory_cost=ARGON2_MEMORY_KIB, parallelism=1)
+
+
+def _scrypt(password, salt, ln, r=SCRYPT_R, p=SCRYPT_P):
+    n = 1 << ln
+    return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r * max(p, 1), dklen=32)
+
+
+def _hash(password, algorithm, cost):
+    if algorithm == 'bcrypt':
+        return bcrypt.hashpw(_bcrypt_secret(password), bcrypt.gensalt(rounds=cost)).decode()
+    if algorithm == 'scrypt':
+        salt = os.urandom(16)
+        return f"$scrypt$ln={cost},r={SCRYPT_R},p={SCRYPT_P}${_b64(salt)}${_b64(_scrypt(password, salt, cost))}"
+    if algorithm == 'argon2':
+        return _argon2(cost).hash(password)
+    raise ValueError(f"Unknown password hash algorithm: {algorithm}")
+
+
+def _identify(stored):
+    """Return (algorithm, params) for a stored hash; params is every tunable the hash was made with."""
+    if stored.startswith(('$2a$', '$2b$', '$2y$')):
+        return 'bcrypt', (int(stored.split('$')[2]),)
+    if stored.startswith('$scrypt$'):
+        params = dict(p.split('=') for p in stored.split('$')[2].split(','))
+        return 'scrypt', (int(params['ln']), int(params['r']), int(params['p']))
+    if stored.startswith('$argon2'):
+        params = dict(p.split('=') for p in stored.split('$')[3].split(','))
+        return 'argon2', (int(params['t']), int(params['m']), int(params['p']))
+    raise ValueError("Unrecognized password hash format")
+
+
+def _configured_params():
+    if ALGORITHM == 'scrypt':
+        return (COST, SCRYPT_R, SCRYPT_P)
+    if ALGORITHM == 'argon2':
+        return (COST, ARGON2_MEMORY_KIB, 1)
+    return (COST,)
+
+
+def _is_current(algorithm, params):
+    # Any difference counts: a lower configured cost (picked by --calibrate) must also be applied
+    return algorithm == ALGORITHM and params == _configured_params()
+
+
+def _verify(password, stored):
+    algorithm, params = _identify(stored)
+    if algorithm == 'bcrypt':
+        ok = bcrypt.checkpw(_bcrypt_secret(password), stored.encode())
+    elif algorithm == 'scrypt':
+        _, _, _, salt, digest = stored.split('$')
+        ok = hmac.compare_digest(_scrypt(password, _unb64(salt), *params), _unb64(digest))
+    else:
+        try:
+            # argon2-cffi reads the parameters from the hash itself
+            ok = _argon2(params[0]).verify(stored, password)
+        except (VerificationError, InvalidHashError):
+            ok = False
+    return ok, (algorithm, params)
+
+
+def needs_rehash(stored):
+    return not _is_current(*_identify(stored))
+
+
+def hash_password(password):
+    """Hash with the configured algorithm and cost."""
+    return _executor.submit(_hash, password, ALGORITHM, COST).result()
+
+
+def verify_password(password, stored):
+    """
+    Check a password against a stored hash.
+
+    Returns (ok, new_hash). new_hash is a fresh hash with the current
+    settings when the password is correct but the stored hash was made with
+    a different algorithm or parameters (higher or lower); otherwise None.
+    """
+    if not password or not stored:
+        return False, None
+    try:
+        ok, (algorithm, params) = _executor.submit(_verify, password, stored).result()
+    except ValueError:
+        return False, None
+    if ok and not _is_current(algorithm, params):
+        return True, hash_password(password)
+    return ok, None
+
+
+# ============ CALIBRATION ============
+
+COST_RANGES = {'bcrypt': range(4, 17), 'scrypt': range(10, 21), 'argon2': range(1, 21)}
+
+
+def _median_ms(algorithm, cost, samples):
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        _hash('correct horse battery staple', algorithm, cost)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(algorithm, target_ms, samples=5):
+    """Return (cost, median_ms) for the highest cost whose median latency stays within target_ms."""
+    best = None
+    for cost in COST_RANGES[algorithm]:
+        ms = _median_ms(algorithm, cost, samples)
+        print(f"  {algorithm:6s} cost={cost:<3d} {ms:8.1f} ms")
+        if ms > target_ms:
+            break
+        best = (cost, ms)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calibrate', action='store_true', required=True)
+    parser.add_argument('--target-ms', type=float, default=250.0, help='Target hashing latency per password')
+    parser.add_argument('--algorithms', default='bcrypt,scrypt,argon2')
+    parser.add_argument('--samples', type=int, default=5)
+    args = parser.parse_args()
+
+    for algorithm in args.algorithms.split(','):
+        if algorithm == 'argon2' and Argon2Hasher is None:
+            print("argon2: skipped (argon2-cffi not installed)")
+            continue
+        print(f"Calibrating {algorithm} for <= {args.target_ms:.0f} ms:")
+        best = calibrate(algorithm, args.target_ms, args.samples)
+        if best is None:
+            print(f"  even the lowest cost exceeds {args.target_ms:.0f} ms")
+            continue
+        cost, ms = best
+        print(f"  -> PASSWORD_HASH_ALGORITHM={algorithm} PASSWORD_HASH_COST={cost} ({ms:.1f} ms)\n")
+
+
+if __name__ == '__main__':
+    main()
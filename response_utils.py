@@ -0,0 +1,174 @@
+"""
+Response optimizations: an in-memory index of the built React bundle,
+gzip/brotli compression for large JSON, and strong ETags with 304 handling.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from flask import request, Response
+from werkzeug.http import parse_etags
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# JSON smaller than this is not worth compressing
+MIN_COMPRESS_SIZE = 1024
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+# Vite puts content-hashed files under assets/, so they never change
+IMMUTABLE_PREFIX = 'assets/'
+ENCODINGS = ('br', 'gzip')
+# Per-user API responses: cacheable by the browser only, always revalidated
+PRIVATE_CACHE_CONTROL = 'private, no-cache'
+
+
+def etag_for(*parts):
+    """Strong ETag from the inputs that fully determine a response body."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part).encode())
+        h.update(b'\0')
+    return h.hexdigest()[:32]
+
+
+def _etag_variants(etag):
+    # Compressed bodies carry a suffixed ETag, which must still match
+    return [etag] + [f'{etag}-{enc}' for enc in ENCODINGS]
+
+
+def etag_matches(if_none_match, etag):
+    """True if a raw If-None-Match header value names `etag` (or a compressed variant)."""
+    etags = parse_etags(if_none_match)
+    return any(etags.contains(tag) for tag in _etag_variants(etag))
+
+
+def not_modified(etag, cache_control=PRIVATE_CACHE_CONTROL):
+    """Return a 304 response if the client already has `etag`, else None."""
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control
+        return response
+    return None
+
+
+def with_etag(response, etag, cache_control=PRIVATE_CACHE_CONTROL):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def _accepted_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=4)
+    return gzip.compress(data, compresslevel=6)
+
+
+def compress_response(response):
+    """after_request hook: compress large JSON bodies the client can decode."""
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or response.mimetype != 'application/json'
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return response
+    encoding = _accepted_encoding()
+    if encoding is None:
+        return response
+
+    response.set_data(_compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f'{etag}-{encoding}', weak=weak)
+    return response
+
+
+class StaticAsset:
+    __slots__ = ('body', 'mimetype', 'etag', 'encoded', 'cache_control')
+
+    def __init__(self, body, mimetype, etag, encoded, cache_control):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = etag
+        self.encoded = encoded
+        self.cache_control = cache_control
+
+
+class StaticAssetIndex:
+    """
+    The React `dist` bundle, read once at startup with precompressed variants.
+
+    Serving is a dict lookup: no os.path.exists or disk read per request.
+    Unknown paths fall back to index.html so client-side routes work.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.assets = {}
+        if os.path.isdir(root):
+            self._build()
+
+    def _build(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                full = os.path.join(dirpath, filename)
+                path = os.path.relpath(full, self.root).replace(os.sep, '/')
+                with open(full, 'rb') as f:
+                    body = f.read()
+                mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+                encoded = {}
+                if mimetype.startswith(COMPRESSIBLE_TYPES) and len(body) >= MIN_COMPRESS_SIZE:
+                    for encoding in ENCODINGS:
+                        if encoding == 'br' and brotli is None:
+                            continue
+                        compressed = _compress(body, encoding)
+                        if len(compressed) < len(body):
+                            encoded[encoding] = compressed
+
+                cache_control = ('public, max-age=31536000, immutable'
+                                 if path.startswith(IMMUTABLE_PREFIX) else 'no-cache')
+                self.assets[path] = StaticAsset(body, mimetype, etag_for(body), encoded, cache_control)
+
+    def serve(self, path):
+        asset = self.assets.get(path) or self.assets.get('index.html')
+        if asset is None:
+            return Response('Not Found', status=404, mimetype='text/plain')
+
+        cached = not_modified(asset.etag, asset.cache_control)
+        if cached is not None:
+            return cached
+
+        encoding = _accepted_encoding()
+        if encoding not in asset.encoded:
+            encoding = 'gzip' if 'gzip' in asset.encoded and request.accept_encodings['gzip'] else None
+
+        response = Response(asset.encoded[encoding] if encoding else asset.body, mimetype=asset.mimetype)
+        # Already compressed here; keep compress_response away from it
+        response.direct_passthrough = True
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+            response.set_etag(f'{asset.etag}-{encoding}')
+        else:
+            response.set_etag(asset.etag)
+        if asset.encoded:
+            response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = asset.cache_control
+        return response
@@ -3,7 +3,6 @@ load_dotenv()
 
 import os
 from flask import Flask
-from flask_bcrypt import Bcrypt
 from getpass import getpass
 import random
 
@@ -11,6 +10,7 @@ import random
 # NOTE: Ensure database.py is the latest version
 from database import db, Admin
 from blind_signature_utils import generate_blind_keys 
+from password_utils import hash_password
 
 # --- CONFIGURATION (Must match app.py) ---
 app = Flask(__name__)
@@ -19,7 +19,6 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = os.urandom(24) 
 
 db.init_app(app)
-bcrypt = Bcrypt(app)
 
 def create_admin():
     """Creates the initial admin user with necessary crypto keys."""
@@ -33,7 +32,7 @@ def create_admin():
 
         print("--- Create PrivyLoans Admin User ---")
         password = getpass(f"Enter password for admin user '{username}': ")
-        hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
+        hashed_password = hash_password(password)
         
         # Generate Blind Signature Keys for the Admin
         BLIND_KEYS = generate_blind_keys()
@@ -5,11 +5,16 @@ import Navbar from '../components/Navbar'
 import Alert from '../components/Alert'
 import './Apply.css'
 
+// One key per distinct form submission, so network retries are deduplicated server-side
+const newIdempotencyKey = () =>
+  window.crypto?.randomUUID ? window.crypto.randomUUID() : `${Date.now()}-${Math.random().toString(36).slice(2)}`
+
 const Apply = () => {
   const navigate = useNavigate()
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState('')
   const [showModal, setShowModal] = useState(false)
+  const [idempotencyKey, setIdempotencyKey] = useState(newIdempotencyKey)
   const [formData, setFormData] = useState({
     name: '',
     email: '',
@@ -24,6 +29,7 @@ const Apply = () => {
 
   const handleChange = (e) => {
     setFormData({ ...formData, [e.target.name]: e.target.value })
+    setIdempotencyKey(newIdempotencyKey())
   }
 
   const handleSubmit = async (e) => {
@@ -35,7 +41,9 @@ const Apply = () => {
     await new Promise(resolve => setTimeout(resolve, 4000))
 
     try {
-      const response = await axios.post('/api/applications/apply', formData)
+      const response = await axios.post('/api/applications/apply', formData, {
+        headers: { 'Idempotency-Key': idempotencyKey }
+      })
       navigate(`/success?app_id=${response.data.app_id}`)
     } catch (err) {
       setError(err.response?.data?.message || 'Application submission failed')
@@ -0,0 +1,297 @@
+"""
+Shared key/value state for everything that must be consistent across
+gunicorn workers and hosts: rate-limit counters, MFA secrets awaiting
+confirmation and short-lived verification caches.
+
+Two implementations with the same interface:
+
+    redis://host:6379/0        RedisStateBackend  (multi-host; needs `redis`)
+    sqlite:///path/state.db    SQLiteStateBackend (single host / tests)
+
+Values are strings, counters are integers, and every write can carry a TTL
+in seconds. incr() and add() are atomic across processes in both backends.
+"""
+import os
+import random
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from limits.storage import Storage
+
+try:
+    import redis
+except ImportError:  # only needed for redis:// URLs
+    redis = None
+
+
+class StateBackend(ABC):
+    """Interface shared by the backends; every operation is O(1) per key."""
+
+    @abstractmethod
+    def get(self, key):
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def add(self, key, value, ttl=None):
+        """Set key only if it does not exist. Returns True if it was set."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def incr(self, key, amount=1, ttl=None):
+        """Atomically add `amount`; the TTL is applied when the key is created."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def ttl(self, key):
+        """Seconds until the key expires, or None if it has no expiry / does not exist."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key):
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self, prefix=''):
+        """Delete every key starting with `prefix`. Returns the number removed."""
+        raise NotImplementedError
+
+
+class RedisStateBackend(StateBackend):
+    # INCRBY and PEXPIRE must happen together or a crash can leave a counter without expiry
+    _INCR_SCRIPT = """
+local v = redis.call('INCRBY', KEYS[1], ARGV[1])
+if v == tonumber(ARGV[1]) and tonumber(ARGV[2]) > 0 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return v
+"""
+
+    def __init__(self, url):
+        if redis is None:
+            raise RuntimeError("The 'redis' package is required for redis:// state backends.")
+        self.client = redis.Redis.from_url(url)
+        self._incr = self.client.register_script(self._INCR_SCRIPT)
+
+    @staticmethod
+    def _ms(ttl):
+        return int(ttl * 1000) if ttl else None
+
+    def get(self, key):
+        value = self.client.get(key)
+        return value.decode() if value is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, value, px=self._ms(ttl))
+
+    def add(self, key, value, ttl=None):
+        return bool(self.client.set(key, value, px=self._ms(ttl), nx=True))
+
+    def incr(self, key, amount=1, ttl=None):
+        return int(self._incr(keys=[key], args=[amount, self._ms(ttl) or 0]))
+
+    def ttl(self, key):
+        ms = self.client.pttl(key)
+        return ms / 1000 if ms >= 0 else None
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def clear(self, prefix=''):
+        removed = 0
+        for key in self.client.scan_iter(match=prefix + '*'):
+            removed += self.client.delete(key)
+        return removed
+
+
+class SQLiteStateBackend(StateBackend):
+    """
+    Single-host stand-in for Redis. Every worker opens the same SQLite file
+    (WAL mode); read-modify-write operations run in BEGIN IMMEDIATE
+    transactions so they are atomic across processes. Expired rows are
+    ignored on read and purged opportunistically on write.
+    """
+
+    PURGE_PROBABILITY = 0.001
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        if path == ':memory:':
+            # One shared connection so all threads see the same data
+            self._shared = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._shared_lock = threading.Lock()
+        else:
+            self._shared = None
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value, expires_at REAL)')
+
+    def _connect(self):
+        if self._shared is not None:
+            return self._shared
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    class _Transaction:
+        # write=False runs a plain autocommit read, which never takes the write lock
+        def __init__(self, backend, write):
+            self.backend = backend
+            self.write = write
+
+        def __enter__(self):
+            if self.backend._shared is not None:
+                self.backend._shared_lock.acquire()
+            self.conn = self.backend._connect()
+            if self.write:
+                self.conn.execute('BEGIN IMMEDIATE')
+            return self.conn
+
+        def __exit__(self, exc_type, exc, tb):
+            try:
+                if self.write:
+                    self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+            finally:
+                if self.backend._shared is not None:
+                    self.backend._shared_lock.release()
+
+    def _transaction(self, write=True):
+        return self._Transaction(self, write)
+
+    @staticmethod
+    def _expires_at(ttl):
+        return time.time() + ttl if ttl else None
+
+    def _live_row(self, conn, key):
+        return conn.execute(
+            'SELECT value, expires_at FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)',
+            (key, time.time())
+        ).fetchone()
+
+    def _maybe_purge(self, conn):
+        if random.random() < self.PURGE_PROBABILITY:
+            conn.execute('DELETE FROM kv WHERE expires_at <= ?', (time.time(),))
+
+    def get(self, key):
+        with self._transaction(write=False) as conn:
+            row = self._live_row(conn, key)
+        return str(row[0]) if row else None
+
+    def set(self, key, value, ttl=None):
+        with self._transaction() as conn:
+            conn.execute('INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)',
+                         (key, value, self._expires_at(ttl)))
+            self._maybe_purge(conn)
+
+    def add(self, key, value, ttl=None):
+        with self._transaction() as conn:
+            if self._live_row(conn, key):
+                return False
+            conn.execute('INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)',
+                         (key, value, self._expires_at(ttl)))
+            self._maybe_purge(conn)
+            return True
+
+    def incr(self, key, amount=1, ttl=None):
+        with self._transaction() as conn:
+            row = self._live_row(conn, key)
+            if row is None:
+                value, expires_at = amount, self._expires_at(ttl)
+            else:
+                value, expires_at = int(row[0]) + amount, row[1]
+            conn.execute('INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)',
+                         (key, value, expires_at))
+            self._maybe_purge(conn)
+            return value
+
+    def ttl(self, key):
+        with self._transaction(write=False) as conn:
+            row = self._live_row(conn, key)
+        if row is None or row[1] is None:
+            return None
+        return max(0.0, row[1] - time.time())
+
+    def delete(self, key):
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM kv WHERE key = ?', (key,))
+
+    def clear(self, prefix=''):
+        with self._transaction() as conn:
+            escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            return conn.execute("DELETE FROM kv WHERE key LIKE ? ESCAPE '\\'", (escaped + '%',)).rowcount
+
+
+def backend_from_url(url):
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisStateBackend(url)
+    if url.startswith('sqlite:///'):
+        return SQLiteStateBackend(url[len('sqlite:///'):])
+    raise ValueError(f"Unsupported state backend URL: {url}")
+
+
+_backends = {}
+
+
+def shared_backend(url):
+    """One backend instance per URL and process (the limiter and the app share it)."""
+    key = (url, os.getpid())
+    if key not in _backends:
+        _backends[key] = backend_from_url(url)
+    return _backends[key]
+
+
+def limiter_storage_uri(url):
+    """Storage URI for Flask-Limiter: Redis natively, SQLite through StateBackendStorage."""
+    if url.startswith('sqlite:///'):
+        return 'state+' + url
+    return url
+
+
+class StateBackendStorage(Storage):
+    """Rate-limit storage for the `limits` library on top of a SQLite state backend."""
+
+    STORAGE_SCHEME = ['state+sqlite']
+    KEY_PREFIX = 'limiter:'
+
+    def __init__(self, uri, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.backend = shared_backend(uri[len('state+'):])
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def incr(self, key, expiry, amount=1):
+        return self.backend.incr(self.KEY_PREFIX + key, amount, ttl=expiry)
+
+    def get(self, key):
+        value = self.backend.get(self.KEY_PREFIX + key)
+        return int(value) if value is not None else 0
+
+    def get_expiry(self, key):
+        remaining = self.backend.ttl(self.KEY_PREFIX + key)
+        return time.time() + (remaining or 0)
+
+    def check(self):
+        try:
+            self.backend.get(self.KEY_PREFIX + 'check')
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        return self.backend.clear(self.KEY_PREFIX)
+
+    def clear(self, key):
+        self.backend.delete(self.KEY_PREFIX + key)
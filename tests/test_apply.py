@@ -0,0 +1,102 @@
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+from cryptography.fernet import Fernet
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# api configures itself from the environment at import time
+_instance = tempfile.mkdtemp(prefix='privyloans-test-')
+os.environ.setdefault('ENCRYPTION_KEY', Fernet.generate_key().decode())
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_instance, 'app.db')}"
+os.environ['STATE_BACKEND_URL'] = f"sqlite:///{os.path.join(_instance, 'state.db')}"
+os.environ['EVENT_LOG_DIR'] = os.path.join(_instance, 'events')
+os.environ['ANALYTICS_DIR'] = os.path.join(_instance, 'analytics')
+os.environ['APPLICATION_SHARD_URLS'] = ''
+os.environ['RATELIMIT_ENABLED'] = 'false'
+os.environ['MODEL_POLL_SECONDS'] = '0'
+os.chdir(ROOT)
+
+import api  # noqa: E402
+
+
+def application(**overrides):
+    body = {'name': 'Asha Rao', 'email': 'asha@example.com', 'pan': 'ABCDE1234F', 'purpose': 'Home',
+            'phone': '9999999999', 'age': 30, 'income': 900_000, 'term': 24, 'amount': 300_000}
+    body.update(overrides)
+    return body
+
+
+@pytest.fixture
+def client():
+    client = api.app.test_client()
+    username = f'user-{uuid.uuid4().hex[:8]}'
+    client.post('/api/auth/register', json={'username': username, 'password': 'pw-123456'})
+    assert client.post('/api/auth/login', json={'username': username, 'password': 'pw-123456'}).status_code == 200
+    return client
+
+
+def apply(client, body, key=None):
+    headers = {'Idempotency-Key': key} if key else {}
+    return client.post('/api/applications/apply', json=body, headers=headers)
+
+
+def test_retry_with_same_key_returns_original(client):
+    first = apply(client, application(), key='k1')
+    assert first.status_code == 201
+    retry = apply(client, application(), key='k1')
+    assert retry.status_code == 200
+    assert retry.get_json() == {'message': 'Application submitted', 'app_id': first.get_json()['app_id'],
+                                'duplicate': True}
+
+
+def test_retry_survives_a_cold_cache(client):
+    first = apply(client, application(), key='k1')
+    api.state.clear('apply:')
+    retry = apply(client, application(), key='k1')
+    assert retry.status_code == 200
+    assert retry.get_json()['app_id'] == first.get_json()['app_id']
+
+
+def test_same_key_different_body_is_rejected(client):
+    assert apply(client, application(), key='k1').status_code == 201
+    assert apply(client, application(amount=400_000), key='k1').status_code == 422
+    api.state.clear('apply:')
+    assert apply(client, application(amount=400_000), key='k1').status_code == 422
+
+
+def test_identical_body_without_key_is_a_duplicate_while_pending(client):
+    first = apply(client, application(email=' ASHA@example.com '))
+    assert first.status_code == 201
+    retry = apply(client, application())
+    assert retry.status_code == 200
+    assert retry.get_json()['app_id'] == first.get_json()['app_id']
+
+
+def test_withdraw_invalidates_the_cached_result(client):
+    first = apply(client, application(), key='k1')
+    app_id = first.get_json()['app_id']
+    assert client.post(f'/api/applications/{app_id}/withdraw').status_code == 200
+    again = apply(client, application(), key='k1')
+    assert again.status_code == 201
+    assert again.get_json()['app_id'] != app_id
+
+
+def test_decision_ends_duplicate_matching(client):
+    first = apply(client, application())
+    app_id = first.get_json()['app_id']
+
+    admin = api.app.test_client()
+    assert admin.post('/api/auth/admin/login', json={'username': 'admin', 'password': 'admin123'}).status_code == 200
+    admin.get('/api/admin/applications')
+    with api.app.app_context():
+        if api.shards.get(app_id).status == 'PENDING':
+            pytest.skip('No model loaded to decide applications')
+
+    again = apply(client, application())
+    assert again.status_code == 201
+    assert again.get_json()['app_id'] != app_id
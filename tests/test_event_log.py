@@ -0,0 +1,34 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_log import EventLog  # noqa: E402
+
+
+def make_log(tmp_path, n=50):
+    log = EventLog(str(tmp_path), fsync=False)
+    for i in range(n):
+        log.emit('application.submitted' if i % 2 else 'application.decided', app_id=f'app-{i % 5}', seq=i)
+    return log
+
+
+def test_query_returns_most_recent_in_time_order(tmp_path):
+    log = make_log(tmp_path)
+    found = log.query(limit=10)
+    assert [e['seq'] for e in found] == list(range(40, 50))
+    assert found == list(log.replay())[-10:]
+
+
+def test_query_filters(tmp_path):
+    log = make_log(tmp_path)
+    found = log.query(limit=3, types=['application.decided'], app_id='app-0')
+    assert [e['seq'] for e in found] == [20, 30, 40]
+    since = found[0]['ts']
+    assert all(e['ts'] >= since for e in log.query(limit=100, since=since))
+
+
+def test_query_non_positive_limit_is_empty(tmp_path):
+    log = make_log(tmp_path)
+    assert log.query(limit=0) == []
+    assert log.query(limit=-5) == []
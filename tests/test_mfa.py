@@ -0,0 +1,58 @@
+import os
+import sys
+
+import pyotp
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mfa_service import INTERVAL, MFAService, decode_secret, totp_code  # noqa: E402
+from state_backend import SQLiteStateBackend  # noqa: E402
+
+SECRET = pyotp.random_base32()
+NOW = 1_760_000_000.0
+
+
+@pytest.fixture
+def mfa():
+    return MFAService(SQLiteStateBackend(':memory:'))
+
+
+def code_at(offset_steps):
+    return pyotp.TOTP(SECRET).at(NOW + offset_steps * INTERVAL)
+
+
+def test_codes_match_pyotp():
+    step = int(NOW // INTERVAL)
+    assert totp_code(decode_secret(SECRET), step) == pyotp.TOTP(SECRET).at(NOW)
+
+
+@pytest.mark.parametrize('offset', [-1, 0, 1])
+def test_window_accepts_adjacent_steps(mfa, offset):
+    assert mfa.verify(1, SECRET, code_at(offset), now=NOW)
+
+
+@pytest.mark.parametrize('offset', [-2, 2])
+def test_codes_outside_window_are_rejected(mfa, offset):
+    assert not mfa.verify(1, SECRET, code_at(offset), now=NOW)
+
+
+def test_code_cannot_be_replayed(mfa):
+    code = code_at(0)
+    assert mfa.verify(1, SECRET, code, now=NOW)
+    assert not mfa.verify(1, SECRET, code, now=NOW)
+    # Still rejected one step later, while the code is inside the window
+    assert not mfa.verify(1, SECRET, code, now=NOW + INTERVAL)
+
+
+def test_replay_guard_is_per_user(mfa):
+    code = code_at(0)
+    assert mfa.verify(1, SECRET, code, now=NOW)
+    assert mfa.verify(2, SECRET, code, now=NOW)
+
+
+def test_rejects_wrong_and_empty_codes(mfa):
+    wrong = str((int(code_at(0)) + 1) % 10 ** 6).zfill(6)
+    assert not mfa.verify(1, SECRET, wrong, now=NOW) or wrong in {code_at(-1), code_at(1)}
+    assert not mfa.verify(1, SECRET, '', now=NOW)
+    assert not mfa.verify(1, None, code_at(0), now=NOW)
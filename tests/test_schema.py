@@ -0,0 +1,51 @@
+import os
+import sys
+from multiprocessing import get_context
+
+from sqlalchemy import Column, MetaData, String, Table, create_engine, inspect
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import shard_metadata, upgrade_schema  # noqa: E402
+
+TABLE = shard_metadata.tables['application']
+
+
+def create_baseline(url):
+    # The application table as first shipped: required columns only, no indexes
+    metadata = MetaData()
+    Table(TABLE.name, metadata, *[Column(c.name, c.type, primary_key=c.primary_key)
+                                  for c in TABLE.columns if not c.nullable])
+    engine = create_engine(url)
+    metadata.create_all(engine)
+    engine.dispose()
+
+
+def upgrade(url):
+    engine = create_engine(url, connect_args={'timeout': 30})
+    upgrade_schema(engine, shard_metadata)
+    engine.dispose()
+
+
+def test_concurrent_upgrades_all_succeed(tmp_path):
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    create_baseline(url)
+
+    ctx = get_context('spawn')
+    procs = [ctx.Process(target=upgrade, args=(url,)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+    assert [p.exitcode for p in procs] == [0, 0, 0, 0]
+
+    inspector = inspect(create_engine(url))
+    assert {c['name'] for c in inspector.get_columns(TABLE.name)} == set(TABLE.c.keys())
+    assert {ix['name'] for ix in inspector.get_indexes(TABLE.name)} == {ix.name for ix in TABLE.indexes}
+
+
+def test_upgrade_is_idempotent(tmp_path):
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    create_baseline(url)
+    upgrade(url)
+    upgrade(url)
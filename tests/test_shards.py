@@ -0,0 +1,149 @@
+import os
+import sys
+import uuid
+
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, event, insert, select, update
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Application, ApplicationShards, db, shard_metadata  # noqa: E402
+
+TABLE = Application.__table__
+
+
+def make_app(tmp_path, n_shards, rebalancing=True):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'main.db'}"
+    app.config['APPLICATION_SHARDS'] = [f"sqlite:///{tmp_path / f'shard{i}.db'}" for i in range(1, n_shards)]
+    app.config['APPLICATION_SHARDS_REBALANCING'] = rebalancing
+    shards = ApplicationShards()
+    shards.init_app(app)
+    db.init_app(app)
+    with app.app_context():
+        db.create_all(bind_key=None)
+        shards.create_all()
+    return app, shards
+
+
+def row(app_id, status='PENDING'):
+    return {
+        'id': app_id, 'user_id': 1, 'name': 'Test', 'amount': 250_000,
+        'encrypted_email': 'e', 'encrypted_phone': 'p', 'encrypted_pan': 'x', 'encrypted_age': 'a',
+        'encrypted_purpose': 'u', 'encrypted_term': 't', 'encrypted_income': 'i',
+        'signature': 's', 'commitment': 'c', 'proof_t': 't', 'proof_s1': 's1', 'proof_s2': 's2',
+        'status': status,
+    }
+
+
+def ids_on(engine):
+    with engine.connect() as conn:
+        return set(conn.execute(select(TABLE.c.id)).scalars())
+
+
+@pytest.fixture
+def app_ids():
+    return [str(uuid.uuid4()) for _ in range(200)]
+
+
+def test_rebalance_moves_rows_to_their_home_shard(tmp_path, app_ids):
+    app, shards = make_app(tmp_path, 1)
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(insert(TABLE), [row(app_id) for app_id in app_ids])
+
+    app, shards = make_app(tmp_path, 3)
+    with app.app_context():
+        moved, skipped = shards.rebalance(batch_size=32)
+        assert skipped == []
+        assert sum(moved.values()) == sum(1 for app_id in app_ids if shards.shard_for(app_id) != 0)
+        for shard in range(shards.count):
+            assert all(shards.shard_for(app_id) == shard for app_id in ids_on(shards.engine(shard)))
+        assert sorted(a.id for a in shards.scalars(select(Application))) == sorted(app_ids)
+        assert shards.count_rows() == len(app_ids)
+        # A second run has nothing left to move
+        assert shards.rebalance() == ({}, [])
+
+
+def test_drain_empties_retired_shard(tmp_path, app_ids):
+    app, shards = make_app(tmp_path, 3)
+    with app.app_context():
+        for app_id in app_ids:
+            with shards.engine(shards.shard_for(app_id)).begin() as conn:
+                conn.execute(insert(TABLE), row(app_id))
+        retired = str(shards.engine(2).url)
+
+    app, shards = make_app(tmp_path, 2)
+    with app.app_context():
+        moved, skipped = shards.rebalance(drain_urls=[retired])
+        assert skipped == []
+        assert sum(n for (source, _), n in moved.items() if source == retired) > 0
+        engine = create_engine(retired)
+        assert ids_on(engine) == set()
+        engine.dispose()
+        assert ids_on(shards.engine(0)) | ids_on(shards.engine(1)) == set(app_ids)
+
+
+def test_write_during_copy_is_not_lost(tmp_path, app_ids):
+    app, shards = make_app(tmp_path, 1)
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(insert(TABLE), [row(app_id) for app_id in app_ids])
+
+    app, shards = make_app(tmp_path, 2)
+    with app.app_context():
+        victim = next(app_id for app_id in app_ids if shards.shard_for(app_id) == 1)
+
+        written = []
+
+        def write_after_copy(conn):
+            # A worker that loaded the row before the copy commits right after it
+            if not written:
+                written.append(victim)
+                with shards.engine(0).begin() as src:
+                    src.execute(update(TABLE).where(TABLE.c.id == victim).values(status='APPROVED'))
+
+        event.listen(shards.engine(1), 'commit', write_after_copy)
+        moved, skipped = shards.rebalance()
+        assert written and skipped == []
+        assert victim not in ids_on(shards.engine(0))
+        assert shards.get(victim).status == 'APPROVED'
+
+
+def test_listings_skip_rows_already_copied_home(tmp_path, app_ids):
+    app, shards = make_app(tmp_path, 2)
+    with app.app_context():
+        app_id = next(a for a in app_ids if shards.shard_for(a) == 1)
+        for shard in (0, 1):
+            with shards.engine(shard).begin() as conn:
+                conn.execute(insert(TABLE), row(app_id, status='PENDING' if shard == 0 else 'APPROVED'))
+        listed = list(shards.scalars(select(Application)))
+        assert [(a.id, a.status) for a in listed] == [(app_id, 'APPROVED')]
+        assert shards.first(select(Application)).status == 'APPROVED'
+        assert shards.count_rows() == 1
+
+
+def test_lookup_fallback_only_while_rebalancing(tmp_path, app_ids):
+    app, shards = make_app(tmp_path, 1)
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(insert(TABLE), [row(app_id) for app_id in app_ids])
+
+    app, shards = make_app(tmp_path, 2, rebalancing=False)
+    with app.app_context():
+        stray = next(a for a in app_ids if shards.shard_for(a) == 1)
+        assert shards.get(stray) is None
+        shards.rebalancing = True
+        assert shards.get(stray).id == stray
+
+
+def test_get_non_string_id_is_not_found(tmp_path):
+    app, shards = make_app(tmp_path, 2)
+    with app.app_context():
+        for app_id in (123, 1.5, ['x'], {'id': 'x'}, None, ''):
+            assert shards.get(app_id) is None
+
+
+def test_shard_metadata_has_application_columns():
+    assert set(shard_metadata.tables['application'].c.keys()) == set(TABLE.c.keys())
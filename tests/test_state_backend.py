@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from state_backend import SQLiteStateBackend, StateBackend  # noqa: E402
+
+
+def test_incomplete_backend_fails_at_construction():
+    class GetOnly(StateBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnly()
+
+
+def test_sqlite_backend_add_and_incr():
+    state = SQLiteStateBackend(':memory:')
+    assert state.add('k', 'v', ttl=60)
+    assert not state.add('k', 'other')
+    assert state.get('k') == 'v'
+    assert state.incr('n') == 1
+    assert state.incr('n', 4) == 5
+    assert state.clear('') == 2
+    assert state.get('k') is None
@@ -0,0 +1,36 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import zkp_utils  # noqa: E402
+from zkp_utils import (order, pedersen_commit, pedersen_commit_and_prove_batch, point_to_bytes,  # noqa: E402
+                       verify_pedersen_opening)
+
+
+def test_batch_matches_single_item_api():
+    items = [(0, 1), (1, 12345), (850_000, None), (order + 7, order - 1), (2_500_000, None)]
+    results = pedersen_commit_and_prove_batch(items)
+    assert len(results) == len(items)
+    for (value, blinding), (C_bytes, v, r, proof) in zip(items, results):
+        if blinding is not None:
+            assert r == blinding
+        C_point, v_single, _ = pedersen_commit(value, r)
+        assert C_bytes == point_to_bytes(C_point)
+        assert v == v_single
+        assert verify_pedersen_opening(C_bytes.hex(), proof)
+
+
+def test_batch_proof_does_not_verify_for_another_commitment():
+    (C1, _, _, proof1), (C2, _, _, _) = pedersen_commit_and_prove_batch([(100, None), (200, None)])
+    assert not verify_pedersen_opening(C2.hex(), proof1)
+
+
+def test_tables_built_safely_on_concurrent_first_use(monkeypatch):
+    monkeypatch.setattr(zkp_utils, '_fixed_base_tables', None)
+    with ThreadPoolExecutor(4) as pool:
+        batches = list(pool.map(lambda v: pedersen_commit_and_prove_batch([(v, 42)]), range(8)))
+    for v, [(C_bytes, _, _, proof)] in enumerate(batches):
+        assert C_bytes == point_to_bytes(pedersen_commit(v, 42)[0])
+        assert verify_pedersen_opening(C_bytes.hex(), proof)
@@ -0,0 +1,263 @@
+"""
+Incremental, out-of-core training pipeline for the loan approval model.
+
+Unlike train_model.py, which loads the whole CSV into memory and refits a
+LogisticRegression, this streams the data in chunks and trains an
+SGDClassifier (logistic loss) with partial_fit, so memory use stays flat no
+matter how many rows there are.
+
+    python train_pipeline.py --csv train.csv --chunksize 100000 --epochs 5
+    python train_pipeline.py --from-db           # decided rows in the Application table
+
+Artifacts are written to models/<version>/ and then published atomically:
+loan_model.joblib and scaler.joblib are replaced with os.replace and
+model_manifest.json is rewritten last, pointing at the new version.
+"""
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+from model_utils import FEATURE_COLUMNS, build_feature_frame
+
+# Only the feature-name notice (DataFrame vs array inputs) is noise here;
+# convergence warnings must stay visible in a training script
+warnings.filterwarnings('ignore', message='X (does not have valid|has) feature names', category=UserWarning)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CLASSES = np.array([0, 1])
+MANIFEST_FILE = 'model_manifest.json'
+MODEL_FILE = 'loan_model.joblib'
+SCALER_FILE = 'scaler.joblib'
+MODELS_DIR = 'models'
+
+# Every `HOLDOUT_EVERY`-th row is kept out of training and used for accuracy
+HOLDOUT_EVERY = 5
+
+
+def prepare_chunk(chunk):
+    """Apply the fixed one-hot schema so every chunk has identical columns."""
+    chunk = chunk.dropna()
+    X = pd.DataFrame({
+        'Age': chunk['Age'].astype(np.float64),
+        'Income': chunk['Income'].astype(np.float64),
+        'Credit_Score': chunk['Credit_Score'].astype(np.float64),
+        'Loan_Amount': chunk['Loan_Amount'].astype(np.float64),
+        'Loan_Term': chunk['Loan_Term'].astype(np.float64),
+        'Employment_Status_Unemployed': (chunk['Employment_Status'] == 'Unemployed').astype(np.float64),
+    }, columns=FEATURE_COLUMNS)
+    y = chunk['Loan_Approved'].astype(np.int64).to_numpy()
+    return X, y
+
+
+def csv_chunks(path, chunksize):
+    def stream():
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            yield prepare_chunk(chunk)
+    return stream
+
+
+def db_chunks(chunksize):
+    """Stream decided applications (APPROVED / REJECTED) out of the database."""
+    from flask import Flask
+    from sqlalchemy import select
+    from database import db, shards, Application
+    from encryption_utils import decrypt_data
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///privyloans.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    shards.config_from_env(app.config)
+    shards.init_app(app)
+    db.init_app(app)
+
+    def stream():
+        with app.app_context():
+            query = select(Application).where(Application.status.in_(['APPROVED', 'REJECTED'])) \
+                .order_by(Application.id).execution_options(yield_per=chunksize)
+            rows = []
+            for app_record in shards.scalars(query):
+                try:
+                    rows.append((
+                        int(decrypt_data(app_record.encrypted_age)),
+                        int(decrypt_data(app_record.encrypted_income)),
+                        app_record.amount,
+                        int(decrypt_data(app_record.encrypted_term)),
+                        int(app_record.status == 'APPROVED'),
+                    ))
+                except ValueError:
+                    continue
+                if len(rows) == chunksize:
+                    yield _db_rows_to_xy(rows)
+                    rows = []
+            if rows:
+                yield _db_rows_to_xy(rows)
+    return stream
+
+
+def _db_rows_to_xy(rows):
+    arr = np.asarray(rows, dtype=np.float64)
+    return build_feature_frame(arr[:, :4]), arr[:, 4].astype(np.int64)
+
+
+def split_holdout(X, y, offset):
+    idx = np.arange(offset, offset + len(y))
+    holdout = idx % HOLDOUT_EVERY == 0
+    return X[~holdout], y[~holdout], X[holdout], y[holdout]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def train(stream, epochs, alpha):
+    stats = {}
+
+    # Pass 1: scaler statistics and class counts
+    start = time.perf_counter()
+    scaler = StandardScaler()
+    counts = np.zeros(2, dtype=np.int64)
+    rows = offset = 0
+    for X, y in stream():
+        X_train, y_train, _, _ = split_holdout(X, y, offset)
+        offset += len(y)
+        if len(y_train):
+            scaler.partial_fit(X_train)
+            counts += np.bincount(y_train, minlength=2)
+        rows += len(y)
+    stats['rows'] = rows
+    stats['scan_rows_per_s'] = rows / (time.perf_counter() - start)
+    if rows == 0 or counts.min() == 0:
+        raise SystemExit("Training data must contain both approved and rejected rows.")
+
+    # Same weighting as class_weight='balanced', which partial_fit cannot compute itself
+    class_weight = {c: counts.sum() / (2 * counts[c]) for c in CLASSES}
+    model = SGDClassifier(loss='log_loss', alpha=alpha, class_weight=class_weight, random_state=42)
+
+    # Passes 2..: incremental fitting
+    start = time.perf_counter()
+    for _ in range(epochs):
+        offset = 0
+        for X, y in stream():
+            X_train, y_train, _, _ = split_holdout(X, y, offset)
+            offset += len(y)
+            if len(y_train):
+                model.partial_fit(scaler.transform(X_train), y_train, classes=CLASSES)
+    stats['train_rows_per_s'] = rows * epochs / (time.perf_counter() - start)
+
+    # Holdout accuracy
+    correct = total = offset = 0
+    for X, y in stream():
+        _, _, X_test, y_test = split_holdout(X, y, offset)
+        offset += len(y)
+        if len(y_test):
+            correct += int((model.predict(scaler.transform(X_test)) == y_test).sum())
+            total += len(y_test)
+    stats['holdout_accuracy'] = correct / total if total else None
+    stats['peak_rss_mb'] = peak_rss_mb()
+    return model, scaler, stats
+
+
+def _atomic_write(path, write):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _copy_file(src, dst):
+    with open(src, 'rb') as f:
+        shutil.copyfileobj(f, dst)
+
+
+def publish(model, scaler, stats, source, output_dir='.'):
+    """Save a versioned copy of the artifacts and atomically make it current."""
+    version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    version_dir = os.path.join(output_dir, MODELS_DIR, version)
+    os.makedirs(version_dir, exist_ok=True)
+
+    model_path = os.path.join(version_dir, MODEL_FILE)
+    scaler_path = os.path.join(version_dir, SCALER_FILE)
+    _atomic_write(model_path, lambda f: joblib.dump(model, f))
+    _atomic_write(scaler_path, lambda f: joblib.dump(scaler, f))
+
+    manifest = {
+        'version': version,
+        'model': os.path.relpath(model_path, output_dir),
+        'scaler': os.path.relpath(scaler_path, output_dir),
+        'features': FEATURE_COLUMNS,
+        'source': source,
+        'stats': stats,
+    }
+    _atomic_write(os.path.join(version_dir, MANIFEST_FILE),
+                  lambda f: f.write(json.dumps(manifest, indent=2).encode()))
+
+    # Top-level copies keep joblib.load('loan_model.joblib') working
+    for src, name in ((model_path, MODEL_FILE), (scaler_path, SCALER_FILE)):
+        _atomic_write(os.path.join(output_dir, name), lambda f, src=src: _copy_file(src, f))
+    _atomic_write(os.path.join(output_dir, MANIFEST_FILE),
+                  lambda f: f.write(json.dumps(manifest, indent=2).encode()))
+    return version
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--csv', default='train.csv', help='Training CSV (default: train.csv)')
+    source.add_argument('--from-db', action='store_true', help='Train on decided rows in the Application table')
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--alpha', type=float, default=1e-4, help='SGD regularization strength')
+    parser.add_argument('--output-dir', default='.')
+    args = parser.parse_args()
+
+    if args.from_db:
+        stream, source_name = db_chunks(args.chunksize), 'database'
+    else:
+        stream, source_name = csv_chunks(args.csv, args.chunksize), args.csv
+
+    print(f"Training from {source_name} in chunks of {args.chunksize:,} rows...")
+    model, scaler, stats = train(stream, args.epochs, args.alpha)
+    version = publish(model, scaler, stats, source_name, args.output_dir)
+
+    print(f"Rows:              {stats['rows']:,}")
+    print(f"Scan throughput:   {stats['scan_rows_per_s']:,.0f} rows/s")
+    print(f"Train throughput:  {stats['train_rows_per_s']:,.0f} rows/s ({args.epochs} epochs)")
+    if stats['holdout_accuracy'] is not None:
+        print(f"Holdout accuracy:  {stats['holdout_accuracy']:.2f}")
+    if stats['peak_rss_mb'] is not None:
+        print(f"Peak memory (RSS): {stats['peak_rss_mb']:.1f} MB")
+    print(f"Published model version {version}")
+
+
+if __name__ == '__main__':
+    main()
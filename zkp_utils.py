@@ -69,3 +69,181 @@ def verify_pedersen_opening(C_bytes_hex, proof):
     lhs = s1 * H + s2 * G
     rhs = t_point + c * C_point
     return lhs == rhs
+
+# ---------------------------------------------------------------------------
+# Batch commitments / proofs
+#
+# The helpers below work directly on (X, Y, Z) Jacobian coordinates so that a
+# whole batch of points can be normalized to affine with a single modular
+# inversion (Montgomery's trick).  Scalar multiplication by the fixed bases G
+# and H uses precomputed window tables, so every multiplication is a short run
+# of mixed additions with no doublings.  Output is byte-for-byte the same
+# format as pedersen_commit / prove_pedersen_opening.
+# ---------------------------------------------------------------------------
+
+_P = curve.curve.p()
+_WINDOW_BITS = 8
+_WINDOW_MASK = (1 << _WINDOW_BITS) - 1
+_WINDOWS = (order.bit_length() + _WINDOW_BITS - 1) // _WINDOW_BITS
+_INFINITY = (0, 1, 0)
+
+def _jac_double(X1, Y1, Z1):
+    # dbl-2009-l, valid for a = 0 (secp256k1)
+    if Z1 == 0 or Y1 == 0:
+        return _INFINITY
+    A = X1 * X1 % _P
+    B = Y1 * Y1 % _P
+    C = B * B % _P
+    D = 2 * ((X1 + B) ** 2 - A - C) % _P
+    E = 3 * A % _P
+    X3 = (E * E - 2 * D) % _P
+    Y3 = (E * (D - X3) - 8 * C) % _P
+    Z3 = 2 * Y1 * Z1 % _P
+    return X3, Y3, Z3
+
+def _jac_add_affine(X1, Y1, Z1, x2, y2):
+    # madd-2007-bl: Jacobian + affine -> Jacobian
+    if Z1 == 0:
+        return x2, y2, 1
+    Z1Z1 = Z1 * Z1 % _P
+    U2 = x2 * Z1Z1 % _P
+    S2 = y2 * Z1 * Z1Z1 % _P
+    H_ = (U2 - X1) % _P
+    r = (S2 - Y1) % _P
+    if H_ == 0:
+        if r == 0:
+            return _jac_double(X1, Y1, Z1)
+        return _INFINITY
+    HH = H_ * H_ % _P
+    HHH = H_ * HH % _P
+    V = X1 * HH % _P
+    X3 = (r * r - HHH - 2 * V) % _P
+    Y3 = (r * (V - X3) - Y1 * HHH) % _P
+    Z3 = Z1 * H_ % _P
+    return X3, Y3, Z3
+
+def _batch_inverse(values):
+    """Invert every element of `values` mod p using a single pow(., -1, p)."""
+    prefix = []
+    acc = 1
+    for v in values:
+        prefix.append(acc)
+        acc = acc * v % _P
+    inv = pow(acc, -1, _P)
+    out = [0] * len(values)
+    for i in range(len(values) - 1, -1, -1):
+        out[i] = prefix[i] * inv % _P
+        inv = inv * values[i] % _P
+    return out
+
+def _batch_to_affine(points):
+    """Normalize a list of Jacobian points to affine (x, y) with one inversion."""
+    if any(Z == 0 for _, _, Z in points):
+        raise ValueError("Point at infinity cannot be encoded")
+    z_invs = _batch_inverse([Z for _, _, Z in points])
+    affine = []
+    for (X, Y, _), zi in zip(points, z_invs):
+        zi2 = zi * zi % _P
+        affine.append((X * zi2 % _P, Y * zi2 * zi % _P))
+    return affine
+
+def _build_fixed_base_table(base: ellipticcurve.Point):
+    """table[w][d] = d * 2^(w * _WINDOW_BITS) * base, in affine coordinates."""
+    window_bases = [(int(base.x()), int(base.y()))]
+    for _ in range(_WINDOWS - 1):
+        X, Y, Z = window_bases[-1] + (1,)
+        for _ in range(_WINDOW_BITS):
+            X, Y, Z = _jac_double(X, Y, Z)
+        window_bases.append(_batch_to_affine([(X, Y, Z)])[0])
+
+    multiples = []
+    for bx, by in window_bases:
+        acc = _INFINITY
+        for _ in range(_WINDOW_MASK):
+            acc = _jac_add_affine(*acc, bx, by)
+            multiples.append(acc)
+    flat = _batch_to_affine(multiples)
+
+    table = []
+    for w in range(_WINDOWS):
+        row = flat[w * _WINDOW_MASK:(w + 1) * _WINDOW_MASK]
+        table.append([None] + row)
+    return table
+
+_fixed_base_tables = None
+
+def _fixed_base_tables_GH():
+    # Built lazily: the single-item API above never pays for the tables.
+    # Published with one assignment, so other threads see both tables or none
+    # (threads racing on the first call each build a copy; one of them is kept).
+    global _fixed_base_tables
+    tables = _fixed_base_tables
+    if tables is None:
+        tables = (_build_fixed_base_table(H), _build_fixed_base_table(G))
+        _fixed_base_tables = tables
+    return tables
+
+def _fixed_base_mul2(a: int, b: int, table_H, table_G):
+    """a*H + b*G as a Jacobian point, using only table lookups and mixed adds."""
+    acc = _INFINITY
+    for w in range(_WINDOWS):
+        shift = w * _WINDOW_BITS
+        da = (a >> shift) & _WINDOW_MASK
+        if da:
+            acc = _jac_add_affine(*acc, *table_H[w][da])
+        db = (b >> shift) & _WINDOW_MASK
+        if db:
+            acc = _jac_add_affine(*acc, *table_G[w][db])
+    return acc
+
+def _affine_to_bytes(x: int, y: int) -> bytes:
+    return b"\x04" + x.to_bytes(32, "big") + y.to_bytes(32, "big")
+
+def pedersen_commit_and_prove_batch(items):
+    """
+    Commit to and prove the opening of many values at once.
+
+    `items` is an iterable of (value, blinding) pairs; a blinding of None is
+    drawn at random, as in pedersen_commit.  Returns a list of
+    (commitment_bytes, v, blinding, proof) tuples where commitment_bytes and
+    proof are identical in format to point_to_bytes(C_point) and
+    prove_pedersen_opening(...).
+    """
+    items = list(items)
+    n = len(items)
+    if n == 0:
+        return []
+
+    # One bulk draw: 32 bytes each for the blinding, k1 and k2 of every item.
+    rand = os.urandom(96 * n)
+    table_H, table_G = _fixed_base_tables_GH()
+
+    scalars = []
+    points = []
+    for i, (value, blinding) in enumerate(items):
+        off = 96 * i
+        if blinding is None:
+            blinding = int_from_bytes(rand[off:off + 32]) % order
+        k1 = int_from_bytes(rand[off + 32:off + 64]) % order
+        k2 = int_from_bytes(rand[off + 64:off + 96]) % order
+        v = value % order
+        r = blinding % order
+        scalars.append((v, blinding, r, k1, k2))
+        points.append(_fixed_base_mul2(v, r, table_H, table_G))
+        points.append(_fixed_base_mul2(k1, k2, table_H, table_G))
+
+    affine = _batch_to_affine(points)
+
+    results = []
+    for i, (v, blinding, r, k1, k2) in enumerate(scalars):
+        C_bytes = _affine_to_bytes(*affine[2 * i])
+        t_bytes = _affine_to_bytes(*affine[2 * i + 1])
+        c = hash_to_int(C_bytes, t_bytes)
+        s1 = (k1 + c * v) % order
+        s2 = (k2 + c * r) % order
+        results.append((C_bytes, v, blinding, {
+            "t": t_bytes.hex(),
+            "s1": str(s1),
+            "s2": str(s2)
+        }))
+    return results